@@ -11,7 +11,6 @@ from app_pages.input_page import show_input_data_page
 from app_pages.nutrition_plan_page import show_nutrition_plan
 from app_pages.health_assessment_page import show_health_assessment
 from app_pages.educational_resources_page import show_educational_resources
-from app_pages.rag_qa_page import show_rag_qa_page
 
 # Set page configuration
 st.set_page_config(
@@ -42,6 +41,8 @@ def main():
     elif page == "Educational Resources":
         show_educational_resources()
     elif page == "Q&A":
+        # Import the RAG page lazily; it pulls in Pinecone, OpenAI and the PDF tooling
+        from app_pages.rag_qa_page import show_rag_qa_page
         show_rag_qa_page()
 
 if __name__ == "__main__":
@@ -17,17 +17,3 @@ import os
 package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if package_dir not in sys.path:
     sys.path.insert(0, package_dir)
-
-# Import utilities to make them available to page modules
-try:
-    from utils.data_processing import *
-    from utils.llm_integration import *
-    from utils.ui_components import *
-    from utils.visualization import *
-    # Add import for genetic modules
-    from utils.genetic_processing import *
-    from utils.genetic_ui_components import *
-    from utils.genetic_llm_integration import *
-except ImportError as e:
-    # If imports fail, print informative message (won't appear in Streamlit UI)
-    print(f"Warning: Could not import utility modules in pages/__init__.py: {e}")
\ No newline at end of file
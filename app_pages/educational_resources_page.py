@@ -9,23 +9,12 @@ Provides educational content about diabetes management.
 """
 
 import streamlit as st
-import matplotlib.pyplot as plt
 import numpy as np
 
-# Import visualization utilities if needed
-try:
-    # Try importing from the root directory
-    from utils.visualization import create_glucose_chart, create_plate_method, create_activity_chart, create_glucose_log
-    # If these functions exist in visualization.py, they will be imported
-    # If not, we'll use our local implementations below
-    USE_VISUALIZATION_MODULE = True
-except ImportError:
-    # If the visualization module isn't available or doesn't have these functions,
-    # we'll use our local implementations
-    USE_VISUALIZATION_MODULE = False
-
 def create_glucose_chart():
     """Create a sample blood glucose chart."""
+    import matplotlib.pyplot as plt
+    
     fig, ax = plt.subplots(figsize=(6, 4))
     
     # Sample data
@@ -47,6 +36,8 @@ def create_glucose_chart():
 
 def create_plate_method():
     """Create a sample plate method visualization."""
+    import matplotlib.pyplot as plt
+    
     fig, ax = plt.subplots(figsize=(6, 6), subplot_kw=dict(aspect="equal"))
     
     # Data for the pie chart
@@ -70,6 +61,8 @@ def create_plate_method():
 
 def create_activity_chart():
     """Create a sample activity benefits chart."""
+    import matplotlib.pyplot as plt
+    
     fig, ax = plt.subplots(figsize=(6, 5))
     
     activities = ["Walking", "Swimming", "Cycling", "Strength Training", "Yoga"]
@@ -86,6 +79,8 @@ def create_activity_chart():
 
 def create_glucose_log():
     """Create a sample blood glucose log."""
+    import matplotlib.pyplot as plt
+    
     fig, ax = plt.subplots(figsize=(6, 5))
     
     # Sample data
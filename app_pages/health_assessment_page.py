@@ -5,10 +5,6 @@ Displays health metrics, genetic insights, and the AI-generated health assessmen
 
 import streamlit as st
 import re
-from utils.visualization import create_health_metrics_visualizations
-from utils.llm_integration import generate_health_assessment
-from utils.genetic_ui_components import show_genetic_insights
-from utils.genetic_llm_integration import generate_genetic_health_assessment
 
 """
 Health assessment page for the Diabetes Nutrition Plan application.
@@ -16,10 +12,6 @@ Displays health metrics, genetic insights, and the AI-generated health assessmen
 """
 
 import streamlit as st
-from utils.visualization import create_health_metrics_visualizations
-from utils.llm_integration import generate_health_assessment
-from utils.genetic_ui_components import show_genetic_insights
-from utils.genetic_llm_integration import generate_genetic_health_assessment
 
 def display_health_assessment(structured_data):
     """
@@ -441,6 +433,12 @@ def show_health_assessment():
             st.rerun()
         return
     
+    # Import matplotlib and the OpenAI-backed generators only when this page renders,
+    # so they are not loaded when the app starts
+    from utils.visualization import create_health_metrics_visualizations
+    from utils.llm_integration import generate_health_assessment
+    from utils.genetic_llm_integration import generate_genetic_health_assessment
+    
     # Check if genetic data is available
     has_genetic_data = 'genetic_profile' in st.session_state and st.session_state.genetic_profile is not None
     
@@ -5,14 +5,11 @@ Handles user input for health, socioeconomic, and genetic data.
 
 import streamlit as st
 import time
-import pandas as pd
 
 # Import from utils directory
-from utils.data_processing import combine_user_data
+from utils.data_processing import combine_user_data, format_display_text
 from utils.ui_components import input_health_data, input_socioeconomic_data, navigate_to_view_plan
 from utils.genetic_ui_components import input_genetic_data
-from utils.llm_integration import generate_nutrition_plan, generate_visual_guidance
-from utils.genetic_llm_integration import generate_genetic_enhanced_nutrition_plan
 from utils.genetic_processing import DIABETES_GENETIC_MARKERS
 
 def display_user_data_review():
@@ -26,38 +23,31 @@ def display_user_data_review():
         st.markdown("<h4 style='font-size: 18px;'>Your Health Information</h4>", unsafe_allow_html=True)
         health_data = st.session_state.health_data
         
+        dietary_restrictions = health_data.get('dietary_restrictions', '')
+        if len(dietary_restrictions) > 50:
+            dietary_restrictions = dietary_restrictions[:50] + "..."
+        
         col1, col2 = st.columns(2)
         with col1:
-            st.write("**Age:**", health_data.get('age'))
-            st.write("**Gender:**", health_data.get('gender'))
-            st.write("**Weight:**", health_data.get('weight'), "kg")
-            st.write("**Height:**", health_data.get('height'), "cm")
-            st.write("**BMI:**", health_data.get('bmi'))
+            st.markdown(
+                f"**Age:** {health_data.get('age')}  \n"
+                f"**Gender:** {health_data.get('gender')}  \n"
+                f"**Weight:** {health_data.get('weight')} kg  \n"
+                f"**Height:** {health_data.get('height')} cm  \n"
+                f"**BMI:** {health_data.get('bmi')}"
+            )
         
         with col2:
-            st.write("**Diabetes Type:**", health_data.get('diabetes_type'))
-            st.write("**HbA1c:**", health_data.get('hba1c'), "%")
-            st.write("**Fasting Glucose:**", health_data.get('fasting_glucose'), "mg/dL")
-            st.write("**Activity Level:**", health_data.get('activity_level'))
-            st.write("**Dietary Restrictions:**", health_data.get('dietary_restrictions')[:50] + "..." if len(health_data.get('dietary_restrictions', '')) > 50 else health_data.get('dietary_restrictions', ''))
-            
-            # Format and display medications
-            medications = health_data.get('medications', '')
-            if medications:
-                formatted_medications = medications.replace('\n', ', ').replace(',,', ',').strip(',')
-                display_text = formatted_medications[:50] + "..." if len(formatted_medications) > 50 else formatted_medications
-                st.write("**Current Medications:**", display_text)
-            else:
-                st.write("**Current Medications:** None")
-
-            # Format and display other conditions
-            other_conditions = health_data.get('other_conditions', '')
-            if other_conditions:
-                formatted_conditions = other_conditions.replace('\n', ', ').replace(',,', ',').strip(',')
-                display_text = formatted_conditions[:50] + "..." if len(formatted_conditions) > 50 else formatted_conditions
-                st.write("**Other Health Conditions:**", display_text)
-            else:
-                st.write("**Other Health Conditions:** None")
+            # Medications and other conditions are shown comma-separated and truncated
+            st.markdown(
+                f"**Diabetes Type:** {health_data.get('diabetes_type')}  \n"
+                f"**HbA1c:** {health_data.get('hba1c')} %  \n"
+                f"**Fasting Glucose:** {health_data.get('fasting_glucose')} mg/dL  \n"
+                f"**Activity Level:** {health_data.get('activity_level')}  \n"
+                f"**Dietary Restrictions:** {dietary_restrictions}  \n"
+                f"**Current Medications:** {format_display_text(health_data.get('medications', ''))}  \n"
+                f"**Other Health Conditions:** {format_display_text(health_data.get('other_conditions', ''))}"
+            )
 
     with socio_tab:
         # Format the socioeconomic data in a more readable way
@@ -65,26 +55,33 @@ def display_user_data_review():
 
         socio_data = st.session_state.socio_data
         
+        cultural_foods = socio_data.get('cultural_foods', '')
+        if len(cultural_foods) > 50:
+            cultural_foods = cultural_foods[:50] + "..."
+        
         col1, col2 = st.columns(2)
         with col1:
-            st.write("**Location:**", socio_data.get('location'))
-            st.write("**Setting:**", socio_data.get('geographic_setting'))
-            st.write("**Income Level:**", socio_data.get('income_level'))
-            st.write("**Education Level:**", socio_data.get('education_level'))
-            st.write("**Literacy Level:**", socio_data.get('literacy_level'))
-            st.write("**Language Preferences:**", socio_data.get('language_preferences'))
-            st.write("**Technology Access:**", socio_data.get('technology_access'))
-            st.write("**Healthcare Access:**", socio_data.get('healthcare_access'))
+            st.markdown(
+                f"**Location:** {socio_data.get('location')}  \n"
+                f"**Setting:** {socio_data.get('geographic_setting')}  \n"
+                f"**Income Level:** {socio_data.get('income_level')}  \n"
+                f"**Education Level:** {socio_data.get('education_level')}  \n"
+                f"**Literacy Level:** {socio_data.get('literacy_level')}  \n"
+                f"**Language Preferences:** {socio_data.get('language_preferences')}  \n"
+                f"**Technology Access:** {socio_data.get('technology_access')}  \n"
+                f"**Healthcare Access:** {socio_data.get('healthcare_access')}"
+            )
         
         with col2:
-            st.write("**Food Availability:**", socio_data.get('local_food_availability'))
-            st.write("**Grocery Budget:**", socio_data.get('grocery_budget'))
-            st.write("**Cooking Facilities:**", socio_data.get('cooking_facilities'))
-            st.write("**Meal Prep Time:**", socio_data.get('meal_prep_time'))
-            st.write("**Family Size:**", socio_data.get('family_size'))
-            st.write("**Support System:**", socio_data.get('support_system'))
-            cultural_foods = socio_data.get('cultural_foods', '')
-            st.write("**Cultural Foods:**", cultural_foods[:50] + "..." if len(cultural_foods) > 50 else cultural_foods)
+            st.markdown(
+                f"**Food Availability:** {socio_data.get('local_food_availability')}  \n"
+                f"**Grocery Budget:** {socio_data.get('grocery_budget')}  \n"
+                f"**Cooking Facilities:** {socio_data.get('cooking_facilities')}  \n"
+                f"**Meal Prep Time:** {socio_data.get('meal_prep_time')}  \n"
+                f"**Family Size:** {socio_data.get('family_size')}  \n"
+                f"**Support System:** {socio_data.get('support_system')}  \n"
+                f"**Cultural Foods:** {cultural_foods}"
+            )
 
     with genetic_tab:
         # Show genetic data preview if available
@@ -137,23 +134,32 @@ def display_user_data_review():
                 
             # Add expandable sections for detailed genetic insights
             with st.expander("Detailed Genetic Insights", expanded=False):
-                st.markdown("#### Carbohydrate Metabolism")
-                st.markdown(f"**Sensitivity:** {genetic_profile.get('carb_metabolism', {}).get('carb_sensitivity', 'Normal').title()}")
-                st.markdown(f"**Explanation:** {genetic_profile.get('carb_metabolism', {}).get('explanation', '')}")
-                
-                st.markdown("#### Fat Metabolism")
-                st.markdown(f"**Saturated Fat Sensitivity:** {genetic_profile.get('fat_metabolism', {}).get('saturated_fat_sensitivity', 'Normal').title()}")
-                st.markdown(f"**Explanation:** {genetic_profile.get('fat_metabolism', {}).get('explanation', '')}")
-                
-                st.markdown("#### Other Genetic Factors")
-                st.markdown(f"**Folate Processing:** {genetic_profile.get('vitamin_metabolism', {}).get('folate_processing', 'Normal').title()}")
-                st.markdown(f"**Inflammatory Response:** {genetic_profile.get('inflammation_response', {}).get('inflammatory_response', 'Normal').title()}")
-                st.markdown(f"**Caffeine Metabolism:** {genetic_profile.get('caffeine_metabolism', {}).get('caffeine_metabolism', 'Normal').title()}")
+                # Bind each factor once; `or {}` only builds a default when the factor is missing
+                carb_data = genetic_profile.get('carb_metabolism') or {}
+                fat_data = genetic_profile.get('fat_metabolism') or {}
+                vitamin_data = genetic_profile.get('vitamin_metabolism') or {}
+                inflammation_data = genetic_profile.get('inflammation_response') or {}
+                caffeine_data = genetic_profile.get('caffeine_metabolism') or {}
+                st.markdown(
+                    "#### Carbohydrate Metabolism\n"
+                    f"**Sensitivity:** {carb_data.get('carb_sensitivity', 'Normal').title()}  \n"
+                    f"**Explanation:** {carb_data.get('explanation', '')}\n\n"
+                    "#### Fat Metabolism\n"
+                    f"**Saturated Fat Sensitivity:** {fat_data.get('saturated_fat_sensitivity', 'Normal').title()}  \n"
+                    f"**Explanation:** {fat_data.get('explanation', '')}\n\n"
+                    "#### Other Genetic Factors\n"
+                    f"**Folate Processing:** {vitamin_data.get('folate_processing', 'Normal').title()}  \n"
+                    f"**Inflammatory Response:** {inflammation_data.get('inflammatory_response', 'Normal').title()}  \n"
+                    f"**Caffeine Metabolism:** {caffeine_data.get('caffeine_metabolism', 'Normal').title()}"
+                )
         else:
             st.info("No genetic data has been provided. To add genetic insights to your nutrition plan, please select 'Upload genetic data file' or 'Use sample data' on the Genetic Information tab.")
 
 def generate_nutrition_plan_workflow():
     """Handle the workflow for generating the nutrition plan."""
+    # Import the LLM integrations lazily; they are only needed once the user clicks Generate
+    from utils.llm_integration import generate_nutrition_plan, generate_visual_guidance
+    from utils.genetic_llm_integration import generate_genetic_enhanced_nutrition_plan
     
     # Create a placeholder for the header text
     header_placeholder = st.empty()
@@ -238,15 +244,13 @@ def generate_nutrition_plan_workflow():
             progress_bar.empty()
             percentage_text.empty()
             
-            # Show completion animation
-            st.balloons()
+            # Show completion animation (only on the first generation this session)
+            if not st.session_state.get('_balloons_shown'):
+                st.balloons()
+                st.session_state._balloons_shown = True
             
-            # Add button to navigate to View Plan page with centered layout
-            col1, col2, col3 = st.columns([1, 3, 1])
-            with col2:
-                if st.button("View My Nutrition Plan", type="secondary", key="view_plan_button", 
-                            use_container_width=True, on_click=navigate_to_view_plan):
-                    pass  # The on_click function handles the navigation
+            # Offer the View Plan button (rendered by the generate tab, see _render_view_plan_button)
+            st.session_state._show_view_plan_button = True
                 
         except Exception as e:
             # Clear progress elements
@@ -322,103 +326,138 @@ def show_input_data_page():
     # Display the content based on the current page
     with content_container:
         if st.session_state.current_page == "health":
-            if 'health_data' not in st.session_state:
-                st.session_state.health_data = {}
-            
-            st.session_state.health_data = input_health_data()
-            
-            col1, col2, col3 = st.columns([1, 2, 1])
-            with col2:
-                # Create a custom styled button with light orange background
-                
-                if st.button("💾 Save Health Information", key="save_health", use_container_width=True, 
-                            type="secondary", help="Save your health information and proceed to the next tab"):
-                    # Switch to the next page
-                    st.session_state.current_page = "socio"
-                    st.success("Health information saved! Proceeding to the Socioeconomic Information tab.")
-                    st.rerun()
-        
+            _render_health_tab()
         elif st.session_state.current_page == "socio":
-            if 'socio_data' not in st.session_state:
-                st.session_state.socio_data = {}
+            _render_socio_tab()
+        elif st.session_state.current_page == "genetic":
+            _render_genetic_tab()
+        elif st.session_state.current_page == "generate":
+            _render_generate_tab()
+
+# Each tab body runs as a fragment so widget interactions inside a tab only
+# rerun that tab instead of the whole page. Tab switches call st.rerun(),
+# which still triggers a full app rerun.
+@st.fragment
+def _render_health_tab():
+    """Render the health data tab."""
+    if 'health_data' not in st.session_state:
+        st.session_state.health_data = {}
+    
+    st.session_state.health_data = input_health_data()
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+        # Create a custom styled button with light orange background
+        
+        if st.button("💾 Save Health Information", key="save_health", use_container_width=True, 
+                    type="secondary", help="Save your health information and proceed to the next tab"):
+            # Switch to the next page
+            st.session_state.current_page = "socio"
+            st.success("Health information saved! Proceeding to the Socioeconomic Information tab.")
+            st.rerun()
+
+@st.fragment
+def _render_socio_tab():
+    """Render the socioeconomic data tab."""
+    if 'socio_data' not in st.session_state:
+        st.session_state.socio_data = {}
+    
+    st.session_state.socio_data = input_socioeconomic_data()
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+        # Create a custom styled button with light orange background
+        
+        if st.button("💾 Save Socioeconomic Information", key="save_socio", use_container_width=True, 
+                    type="secondary", help="Save your socioeconomic information and proceed to genetic information"):
+            # Switch to the next page
+            st.session_state.current_page = "genetic"
+            st.success("Socioeconomic information saved! Proceeding to the Genetic Information tab.")
+            st.rerun()
+
+@st.fragment
+def _render_genetic_tab():
+    """Render the genetic data tab."""
+    # Collect genetic data
+    input_genetic_data()
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+        # Create a custom styled button with light orange background
+        
+        if st.button("💾 Save Genetic Information", key="save_genetic", use_container_width=True, 
+                    type="secondary", help="Save your genetic information and proceed to generate plan"):
+            # Switch to the next page
+            st.session_state.current_page = "generate"
+            if 'genetic_profile' in st.session_state and st.session_state.genetic_profile is not None:
+                st.success("Genetic information saved! Your nutrition plan will incorporate genetic insights. Proceeding to the Generate Plan tab.")
+            else:
+                st.success("No genetic data provided. Your plan will be generated without genetic optimization. Proceeding to the Generate Plan tab.")
+            st.rerun()
+
+def _render_view_plan_button():
+    """Render the button that opens the generated plan on the Nutrition Plan page."""
+    # Add button to navigate to View Plan page with centered layout
+    col1, col2, col3 = st.columns([1, 3, 1])
+    with col2:
+        if st.button("View My Nutrition Plan", type="secondary", key="view_plan_button",
+                     use_container_width=True):
+            navigate_to_view_plan()
+            del st.session_state._show_view_plan_button
+            # The click only reran this fragment; the page switch needs the whole app to rerun
+            st.rerun(scope="app")
+
+@st.fragment
+def _render_generate_tab():
+    """Render the generate plan tab."""
+    if 'health_data' in st.session_state and 'socio_data' in st.session_state:
+        # Check if genetic data is available
+        has_genetic_data = 'genetic_profile' in st.session_state and st.session_state.genetic_profile is not None
+        
+        if has_genetic_data:
+            st.info("You're almost there! Review your information before generating your genetically-optimized nutrition plan.")
+        else:
+            st.info("You're almost there! Review your information before generating your personalized nutrition plan.")
+        
+        
+        # Create a centered column layout with custom widths for buttons
+        col1, col2, col3 = st.columns([1, 3, 1])
+        with col2:
+            # Create a two-column layout within the center column for the buttons
+            btn_col1, btn_col2 = st.columns(2)
             
-            st.session_state.socio_data = input_socioeconomic_data()
+            with btn_col1:
+                show_button = st.button("📋 Review Your Data", use_container_width=True, type="secondary",
+                                      help="View the information you've provided")
             
-            col1, col2, col3 = st.columns([1, 2, 1])
-            with col2:
-                # Create a custom styled button with light orange background
-                
-                if st.button("💾 Save Socioeconomic Information", key="save_socio", use_container_width=True, 
-                            type="secondary", help="Save your socioeconomic information and proceed to genetic information"):
-                    # Switch to the next page
-                    st.session_state.current_page = "genetic"
-                    st.success("Socioeconomic information saved! Proceeding to the Genetic Information tab.")
-                    st.rerun()
+            with btn_col2:
+                # Customize the button text based on genetic data availability
+                button_text = "✨ Create My Nutrition Plan" if has_genetic_data else "✨ Create My Nutrition Plan"
+                generate_button = st.button(button_text, key="generate_plan", 
+                                          use_container_width=True, type="secondary",
+                                          help="Generate your personalized nutrition plan based on your information")
         
-        elif st.session_state.current_page == "genetic":
-            # Collect genetic data
-            input_genetic_data()
-            
-            col1, col2, col3 = st.columns([1, 2, 1])
-            with col2:
-                # Create a custom styled button with light orange background
-                
-                if st.button("💾 Save Genetic Information", key="save_genetic", use_container_width=True, 
-                            type="secondary", help="Save your genetic information and proceed to generate plan"):
-                    # Switch to the next page
-                    st.session_state.current_page = "generate"
-                    if 'genetic_profile' in st.session_state and st.session_state.genetic_profile is not None:
-                        st.success("Genetic information saved! Your nutrition plan will incorporate genetic insights. Proceeding to the Generate Plan tab.")
-                    else:
-                        st.success("No genetic data provided. Your plan will be generated without genetic optimization. Proceeding to the Generate Plan tab.")
-                    st.rerun()
+        if show_button:
+            display_user_data_review()
         
-        elif st.session_state.current_page == "generate":
-            if 'health_data' in st.session_state and 'socio_data' in st.session_state:
-                # Check if genetic data is available
-                has_genetic_data = 'genetic_profile' in st.session_state and st.session_state.genetic_profile is not None
-                
-                if has_genetic_data:
-                    st.info("You're almost there! Review your information before generating your genetically-optimized nutrition plan.")
-                else:
-                    st.info("You're almost there! Review your information before generating your personalized nutrition plan.")
-                
-                
-                # Create a centered column layout with custom widths for buttons
-                col1, col2, col3 = st.columns([1, 3, 1])
-                with col2:
-                    # Create a two-column layout within the center column for the buttons
-                    btn_col1, btn_col2 = st.columns(2)
-                    
-                    with btn_col1:
-                        show_button = st.button("📋 Review Your Data", use_container_width=True, type="secondary",
-                                              help="View the information you've provided")
-                    
-                    with btn_col2:
-                        # Customize the button text based on genetic data availability
-                        button_text = "✨ Create My Nutrition Plan" if has_genetic_data else "✨ Create My Nutrition Plan"
-                        generate_button = st.button(button_text, key="generate_plan", 
-                                                  use_container_width=True, type="secondary",
-                                                  help="Generate your personalized nutrition plan based on your information")
-                
-                if show_button:
-                    display_user_data_review()
-                
-                if generate_button:
-                    generate_nutrition_plan_workflow()
-            
-            else:
-                # Create a more visually appealing warning
-                st.markdown("""
-                <div style="
-                    background-color: #FFF3E0; 
-                    padding: 15px; 
-                    border-left: 5px solid #FF9800;
-                    border-radius: 4px;
-                    margin: 10px 0;
-                ">
-                    <h4 style="color: #E65100; margin-top: 0;">Information Needed</h4>
-                    <p>Please complete both the Health Information and Socioeconomic Information tabs before generating a plan.</p>
-                    <p>Genetic information is optional but recommended for a more personalized plan.</p>
-                </div>
-                """, unsafe_allow_html=True)
+        if generate_button:
+            generate_nutrition_plan_workflow()
+        
+        if st.session_state.get('_show_view_plan_button'):
+            _render_view_plan_button()
+    
+    else:
+        # Create a more visually appealing warning
+        st.markdown("""
+        <div style="
+            background-color: #FFF3E0; 
+            padding: 15px; 
+            border-left: 5px solid #FF9800;
+            border-radius: 4px;
+            margin: 10px 0;
+        ">
+            <h4 style="color: #E65100; margin-top: 0;">Information Needed</h4>
+            <p>Please complete both the Health Information and Socioeconomic Information tabs before generating a plan.</p>
+            <p>Genetic information is optional but recommended for a more personalized plan.</p>
+        </div>
+        """, unsafe_allow_html=True)
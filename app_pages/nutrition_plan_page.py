@@ -5,39 +5,475 @@ Displays the generated nutrition plan, genetic optimization, and visual guidance
 
 import streamlit as st
 import re
-from datetime import datetime
-from utils.visualization import (
-    create_enhanced_portion_guide,
-    create_enhanced_glucose_guide,
-    create_foods_to_avoid_visual,
-    create_recommended_foods_visual
+import html
+import json
+import hashlib
+from functools import partial
+from types import MappingProxyType
+from typing import NamedTuple
+
+# Keyword patterns used to assign sections of a complete plan to each tab
+OVERVIEW_RE = re.compile(r'introduction|overview|caloric|macronutrient|recommended')
+MEAL_PLAN_RE = re.compile(r'meal plan|sample meal|day 1|day 2|day 3')
+GENETIC_RE = re.compile(r'genetic|gene|dna|nutrigenomics|personalized metabolism')
+RECIPE_RE = re.compile(r'recipe|tips|avoid|limit|portion|guideline|stabilize')
+RECIPE_EXCLUDE_RE = re.compile(r'genetic|gene|dna')
+
+# Splits a plan before each level-2 header, keeping the "## " prefix on every section
+SECTION_SPLIT_RE = re.compile(r'^(?=## )', re.MULTILINE)
+RESTRICTION_SPLIT_RE = re.compile(r'\s*,\s*')
+
+# Strips HTML tags from plan text before converting it to printable HTML
+TAG_RE = re.compile(r'<.*?>')
+
+# Emojis enlarged in the printable HTML; longer sequences come first so
+# variation-selector emojis (e.g. ⏱️) are matched whole
+PLAN_EMOJIS = (
+    '🔥', '🥗', '⏱️', '🌾', '🥩', '🥑', '🥦', '🍎', '🥤', '🌞',
+    '🥪', '🍲', '🍏', '🍽️', '🥛', '📉', '📈', '⏰', '🥕', '🍞',
+    '🍟', '🥓', '🍰', '☕', '🍗', '🫒', '🫘', '🐟', '🫐', '🥬'
 )
+EMOJI_RE = re.compile('(' + '|'.join(map(re.escape, sorted(PLAN_EMOJIS, key=len, reverse=True))) + ')')
+
+# Static parts of the printable HTML document; __DATE__ is filled in per export
+HTML_HEAD = """
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>Diabetes Nutrition Plan</title>
+    <style>
+        @page { size: letter; margin: 1cm; }
+        body {
+            font-family: Arial, sans-serif;
+            line-height: 1.6;
+            color: #333;
+            max-width: 800px;
+            margin: 0 auto;
+            padding: 20px;
+        }
+        h1, h2, h3, h4 {
+            color: #2c3e50;
+            margin-top: 1.5em;
+        }
+        h1 {
+            text-align: center;
+            color: #3498db;
+            border-bottom: 2px solid #3498db;
+            padding-bottom: 10px;
+        }
+        .header {
+            text-align: center;
+            margin-bottom: 30px;
+        }
+        .date {
+            color: #7f8c8d;
+            font-style: italic;
+            text-align: center;
+            margin-bottom: 20px;
+        }
+        .section {
+            margin-bottom: 30px;
+            page-break-inside: avoid;
+        }
+        .footer {
+            margin-top: 50px;
+            text-align: center;
+            font-size: 0.9em;
+            color: #7f8c8d;
+            border-top: 1px solid #eee;
+            padding-top: 20px;
+        }
+        ul, ol {
+            margin-left: 20px;
+        }
+        table {
+            width: 100%;
+            border-collapse: collapse;
+            margin: 20px 0;
+        }
+        table, th, td {
+            border: 1px solid #ddd;
+        }
+        th, td {
+            padding: 12px;
+            text-align: left;
+        }
+        th {
+            background-color: #f2f2f2;
+        }
+        hr {
+            border: 0;
+            height: 1px;
+            background: #ddd;
+            margin: 20px 0;
+        }
+        .emoji {
+            font-size: 1.2em;
+        }
+        @media print {
+            body {
+                font-size: 12pt;
+            }
+            h1 {
+                font-size: 18pt;
+            }
+            h2 {
+                font-size: 16pt;
+            }
+            h3 {
+                font-size: 14pt;
+            }
+            .no-print {
+                display: none;
+            }
+            @page {
+                margin: 2cm;
+            }
+        }
+    </style>
+</head>
+<body>
+    <div class="header">
+        <h1>Personalized Diabetes Nutrition Plan</h1>
+        <p class="date">Generated on __DATE__</p>
+    </div>
+"""
+
+HTML_FOOTER = """
+    <div class="footer">
+        <p>This nutrition plan is personalized based on your health information and is intended as a guide.</p>
+        <p>Always consult with healthcare providers before making significant changes to your diet.</p>
+    </div>
+</body>
+</html>
+"""
+
+# Button styles for the "no plan yet" view
+NO_PLAN_CSS = """
+<style>
+/* Style for the active tab (primary button) */
+.stButton button[kind="primary"] {
+    background-color: #87CEEB !important; /* Sky blue */
+    color: #333333 !important; /* Dark gray for text */
+    border-color: #000000 !important; /* Black border */
+    font-weight: 600 !important;
+}
+
+/* Hover effect for inactive tabs */
+.stButton button[kind="secondary"]:hover {
+    background-color: #E5E4E2 !important; /* Very light blue on hover */
+    color: #333333 !important; /* Dark gray for text */
+    border-color: #000000 !important; /* Black border */
+    font-weight: 600 !important;
+}
+
+</style>
+"""
+
+# Genetic Optimization fallback shown below the per-factor columns
+GENETIC_FALLBACK_MD = """
+### Food Recommendations Based on Your Genetic Profile
+
+| Category | Recommended Foods based on Genetics |
+|----------|-------------------------------------|
+| **Carbohydrates** | Whole grains, legumes, vegetables (personalized based on your carbohydrate metabolism) |
+| **Proteins** | Lean proteins, fatty fish (optimized for your inflammatory profile) |
+| **Fats** | Olive oil, avocados, nuts (tailored to your fat metabolism) |
+| **Supplements to Consider** | B-vitamins, omega-3 fatty acids (based on your genetic profile) |
+
+### Key Recommendations Based on Your Genetic Profile
+
+{recommendations}
+
+### Genetic Nutrition Disclaimer
+
+The genetic optimization suggestions provided are based on a limited set of genetic markers and current scientific understanding, which continues to evolve. Individual responses may vary, and these recommendations should be considered as complementary to standard diabetes management practices.
+
+Always consult with healthcare providers before making significant changes to your diet or lifestyle based on genetic information.
+"""
+
+# Read-only stand-in for a genetic factor missing from the profile
+EMPTY_FACTOR = MappingProxyType({})
+
+# Dietary restrictions that swap in plant-based food examples
+PLANT_BASED_DIETS = frozenset({"Vegetarian", "Vegan"})
+
+# Genetic optimization advice keyed by sensitivity level
+CARB_ADVICE = {
+    "high": "Focus on complex carbohydrates with fiber",
+    "higher": "Be mindful of carbohydrate quality and portion size",
+}
+CARB_ADVICE_DEFAULT = "Balance your carbohydrate intake according to the portion guide"
+
+FAT_ADVICE = {
+    "high": "Limit saturated fats; choose plant oils & lean proteins",
+    "moderate": "Moderate your saturated fat intake; focus on unsaturated fats",
+}
+FAT_ADVICE_DEFAULT = "Include a balanced mix of fats, emphasizing unsaturated sources"
+
+class FoodItem(NamedTuple):
+    """A food shown in the Visual Guides lists, with its icon and rationale."""
+    icon: str
+    name: str
+    reason: str
+
+# Foods listed under "Why Limit These Foods?"
+BASE_LIMIT_FOODS = (
+    FoodItem("🍞", "White Bread and Refined Grains", "Cause rapid blood sugar spikes"),
+    FoodItem("🥤", "Sugary Drinks", "High in simple sugars with little nutritional value"),
+    FoodItem("🍟", "Fried Foods", "High in unhealthy fats that can worsen insulin resistance")
+)
+PROCESSED_FOODS = FoodItem("🥫", "Processed Foods", "Often high in sodium, sugar, and unhealthy additives")
+PROCESSED_MEATS = FoodItem("🥓", "Processed Meats", "High in sodium and unhealthy fats")
+SWEETS = FoodItem("🍰", "Sweets & Desserts", "High in sugar and calories with minimal nutrition")
+
+# Foods listed under "Why Choose These Foods?"
+BASE_CHOOSE_FOODS = (
+    FoodItem("🌾", "Whole Grains", "High in fiber which slows sugar absorption into the bloodstream"),
+    FoodItem("🍎", "Fresh Fruit", "Contains natural sugars with fiber, vitamins, and antioxidants")
+)
+PLANT_PROTEIN = FoodItem("🥚", "Protein", "Options like tofu, legumes, and eggs provide protein without raising blood sugar")
+ANIMAL_PROTEIN = FoodItem("🍗", "Protein", "Helps maintain steady blood sugar and promotes satiety")
+OLIVE_OIL = FoodItem("🫒", "Olive Oil", "Mediterranean staple that improves insulin sensitivity")
+HEALTHY_FATS = FoodItem("🥑", "Healthy Fats", "Improves insulin sensitivity and slows digestion of carbohydrates")
+BEANS = FoodItem("🫘", "Beans", "Latin American staple high in protein and fiber with minimal impact on blood glucose")
+LEGUMES = FoodItem("🫘", "Legumes", "High in protein and fiber with minimal impact on blood glucose")
+BERRIES = FoodItem("🫐", "Berries", "High in antioxidants that help reduce inflammation")
+
+# (keyword in cultural preferences, food to show, default food) in display order
+CULTURAL_FOOD_SWAPS = (
+    ("Mediterranean", OLIVE_OIL, HEALTHY_FATS),
+    ("Latin", BEANS, LEGUMES),
+)
+
+# Genetic rules as (factor, field, triggering levels, foods); "{level}" in a
+# reason is filled in with the user's level for that field
+GENETIC_LIMIT_RULES = (
+    ("caffeine_metabolism", "caffeine_metabolism", frozenset({"slow", "very slow"}), (
+        FoodItem("☕", "Caffeine", "Your genetic profile indicates {level} caffeine metabolism"),
+    )),
+)
+GENETIC_CHOOSE_RULES = (
+    ("inflammation_response", "inflammatory_response", frozenset({"elevated", "moderate"}), (
+        FoodItem("🐟", "Fatty Fish", "Rich in omega-3s to help manage your {level} inflammatory response"),
+        BERRIES,
+    )),
+    ("vitamin_metabolism", "folate_processing", frozenset({"reduced", "significantly reduced"}), (
+        FoodItem("🥬", "Leafy Greens", "Rich in folate to support your {level} folate processing ability"),
+    )),
+)
+
+# Static HTML blocks used by the Visual Guides section
+PORTION_NOTE_HTML = """
+<div style="background-color: #e8f5e9; padding: 15px; border-radius: 10px; margin-top: 20px;">
+    <h4 style="color: #2e7d32;">How to Use This Portion Guide</h4>
+    <ul>
+        <li><strong>Half your plate</strong> should be filled with non-starchy vegetables</li>
+        <li><strong>One quarter</strong> should contain lean proteins</li>
+        <li><strong>One quarter</strong> should have complex carbohydrates</li>
+        <li>Include a small serving of fruit and/or dairy on the side</li>
+        <li>Add healthy fats in small amounts (olive oil, avocado, nuts)</li>
+    </ul>
+</div>
+"""
+
+GENETIC_NOTE_TEMPLATE = """
+<div style="background-color: #E8EAF6; padding: 15px; border-radius: 10px; margin-top: 20px; border-left: 5px solid #3F51B5;">
+    <h4 style="color: #3F51B5;">Genetic Optimization Notes</h4>
+    <ul>
+        <li><strong>Carbohydrates:</strong> {carb}</li>
+        <li><strong>Fats:</strong> {fat}</li>
+    </ul>
+</div>
+"""
+
+LIMIT_HEADER_HTML = """
+<div style="background-color: #ffebee; padding: 15px; border-radius: 10px;">
+    <h4 style="color: #c62828; margin-top: 0;">Why Limit These Foods?</h4>
+</div>
+"""
+
+CHOOSE_HEADER_HTML = """
+<div style="background-color: #e8f5e9; padding: 0px; border-radius: 0px;">
+    <h4 style="color: #2e7d32; margin-top: 10;">Why Choose These Foods?</h4>
+</div>
+"""
+
+GENETIC_DISCLAIMER_HTML = """
+<div style="background-color: #F3E5F5; padding: 15px; border-radius: 10px; margin-top: 20px; border-left: 5px solid #9C27B0;">
+    <h4 style="color: #9C27B0;">Genetic Nutrition Disclaimer</h4>
+    <p>The genetic optimization suggestions provided are based on a limited set of genetic markers and current scientific understanding, which continues to evolve. Individual responses may vary, and these recommendations should be considered as complementary to standard diabetes management practices.</p>
+    <p>Always consult with healthcare providers before making significant changes to your diet or lifestyle based on genetic information.</p>
+</div>
+"""
+
+def split_plan_sections(nutrition_plan):
+    """
+    Split a complete nutrition plan into the sections shown on each tab.
+    
+    Args:
+        nutrition_plan (str): The complete nutrition plan in markdown
+        
+    Returns:
+        tuple: (overview_sections, meal_plan_sections, genetic_sections, recipe_sections)
+    """
+    sections = [section for section in SECTION_SPLIT_RE.split(nutrition_plan) if section]
+    overview_sections, meal_plan_sections, genetic_sections, recipe_sections = [], [], [], []
+    
+    # Single pass: lowercase each section once and assign it to every matching bucket
+    for section in sections:
+        lowered = section.lower()
+        if OVERVIEW_RE.search(lowered):
+            overview_sections.append(section)
+        if MEAL_PLAN_RE.search(lowered):
+            meal_plan_sections.append(section)
+        if GENETIC_RE.search(lowered):
+            genetic_sections.append(section)
+        if RECIPE_RE.search(lowered) and not RECIPE_EXCLUDE_RE.search(lowered):
+            recipe_sections.append(section)
+    
+    return overview_sections, meal_plan_sections, genetic_sections, recipe_sections
+
+def get_plan_sections(nutrition_plan):
+    """
+    Get the tab sections of a nutrition plan, memoized in session state.
+    
+    The sections are only recomputed when the plan changes.
+    
+    Args:
+        nutrition_plan (str): The complete nutrition plan in markdown
+        
+    Returns:
+        tuple: (overview_sections, meal_plan_sections, genetic_sections, recipe_sections)
+    """
+    plan_hash = hash(nutrition_plan)
+    if st.session_state.get('_plan_sections_hash') == plan_hash:
+        return st.session_state._plan_sections
+    
+    plan_sections = split_plan_sections(nutrition_plan)
+    st.session_state._plan_sections = plan_sections
+    st.session_state._plan_sections_hash = plan_hash
+    return plan_sections
+
+# Each plan section is a fragment, so widgets inside it (such as the
+# download button) rerun only that section. Switching sections with the
+# selector still triggers a full app rerun.
+@st.fragment
+def _render_overview_tab():
+    """Render the Overview section."""
+    # Add download button at the top of the overview tab; the HTML is only
+    # built when the button is clicked
+    st.download_button(
+        label="📥 Download Nutrition Plan",
+        data=nutrition_plan_html_builder(),
+        file_name="diabetes_nutrition_plan.html",
+        mime="text/html",
+        key="download_nutrition_plan",
+        help="Download your nutrition plan as an HTML file that you can open in any browser and print to PDF"
+    )
+    
+    # Display genetic badge at the top if genetic data is used
+    
+    if 'nutrition_overview' in st.session_state:
+        st.markdown(st.session_state.nutrition_overview, unsafe_allow_html=True)
+    else:
+        # Fall back to extracting from the complete plan if separate sections aren't available
+        overview_sections = get_plan_sections(st.session_state.nutrition_plan)[0]
+        for section in overview_sections:
+            st.markdown(section, unsafe_allow_html=True)
+
+@st.fragment
+def _render_meal_plan_tab():
+    """Render the Meal Plan section."""
+    # For genetic plans, add a small indicator that this is genetically optimized
+    
+    if 'nutrition_meal_plan' in st.session_state:
+        st.markdown(st.session_state.nutrition_meal_plan, unsafe_allow_html=True)
+    else:
+        # Fall back to extracting from the complete plan
+        meal_plan_sections = get_plan_sections(st.session_state.nutrition_plan)[1]
+        for section in meal_plan_sections:
+            st.markdown(section, unsafe_allow_html=True)
+
+@st.fragment
+def _render_genetic_tab():
+    """Render the Genetic Optimization section."""
+    # If we have the dedicated genetic section from the structured plan, use it
+    if 'nutrition_genetic_section' in st.session_state:
+        st.markdown(st.session_state.nutrition_genetic_section, unsafe_allow_html=True)
+    else:
+        # If no structured genetic section is available, try to find relevant sections
+        # from the complete plan or fall back to the genetic profile
+        genetic_sections = get_plan_sections(st.session_state.nutrition_plan)[2]
+        if genetic_sections:
+            for section in genetic_sections:
+                st.markdown(section, unsafe_allow_html=True)
+        else:
+            # If no explicit genetic sections found, display genetic profile information
+            genetic_profile = st.session_state.genetic_profile
+            carb_data = genetic_profile.get("carb_metabolism") or EMPTY_FACTOR
+            fat_data = genetic_profile.get("fat_metabolism") or EMPTY_FACTOR
+            inflammation_data = genetic_profile.get("inflammation_response") or EMPTY_FACTOR
+            caffeine_data = genetic_profile.get("caffeine_metabolism") or EMPTY_FACTOR
+            
+            st.subheader("Your Genetic Profile Summary")
+            st.info(genetic_profile.get('overall_summary', 'No genetic summary available.'))
+            
+            st.subheader("How Your Nutrition Plan Has Been Optimized")
+            
+            # Create columns for each major genetic factor, one markdown block per column
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.markdown(
+                    "#### Carbohydrate Metabolism\n\n"
+                    f"**Your Profile:** {carb_data.get('carb_sensitivity', 'Normal').title()}\n\n"
+                    f"**What this means:** {carb_data.get('explanation', '')}\n\n"
+                    "#### Fat Metabolism\n\n"
+                    f"**Your Profile:** {fat_data.get('saturated_fat_sensitivity', 'Normal').title()} sensitivity to saturated fats\n\n"
+                    f"**What this means:** {fat_data.get('explanation', '')}"
+                )
+            
+            with col2:
+                st.markdown(
+                    "#### Inflammation Response\n\n"
+                    f"**Your Profile:** {inflammation_data.get('inflammatory_response', 'Normal').title()}\n\n"
+                    f"**What this means:** {inflammation_data.get('explanation', '')}\n\n"
+                    "#### Caffeine Metabolism\n\n"
+                    f"**Your Profile:** {caffeine_data.get('caffeine_metabolism', 'Normal').title()}\n\n"
+                    f"**What this means:** {caffeine_data.get('explanation', '')}"
+                )
+            
+            # Recommendations table, key recommendations and disclaimer in one block
+            recommendations = "\n".join(f"- {rec}" for rec in genetic_profile.get('key_recommendations', []))
+            st.markdown(GENETIC_FALLBACK_MD.format(recommendations=recommendations))
+
+@st.fragment
+def _render_recipes_tab():
+    """Render the Recipes & Tips section."""
+    if 'nutrition_recipes_tips' in st.session_state:
+        st.markdown(st.session_state.nutrition_recipes_tips, unsafe_allow_html=True)
+    else:
+        # Fall back to extracting from the complete plan
+        recipe_sections = get_plan_sections(st.session_state.nutrition_plan)[3]
+        for section in recipe_sections:
+            st.markdown(section, unsafe_allow_html=True)
+
+@st.fragment
+def _render_visual_guides_tab(has_genetic_data):
+    """Render the Visual Guides section."""
+    if 'visual_guidance' in st.session_state:
+        display_visual_guidance(has_genetic_data)
+    else:
+        st.warning("No visual guidance has been generated yet.")
 
 def show_nutrition_plan():
     """Display the generated nutrition plan."""
     if 'nutrition_plan' not in st.session_state:
         st.warning("No nutrition plan has been generated yet. Please go to the Input Data page first.")
         
-        st.markdown("""
-        <style>
-        /* Style for the active tab (primary button) */
-        .stButton button[kind="primary"] {
-            background-color: #87CEEB !important; /* Sky blue */
-            color: #333333 !important; /* Dark gray for text */
-            border-color: #000000 !important; /* Black border */
-            font-weight: 600 !important;
-        }
-        
-        /* Hover effect for inactive tabs */
-        .stButton button[kind="secondary"]:hover {
-            background-color: #E5E4E2 !important; /* Very light blue on hover */
-            color: #333333 !important; /* Dark gray for text */
-            border-color: #000000 !important; /* Black border */
-            font-weight: 600 !important;
-        }
-        
-        </style>
-""", unsafe_allow_html=True)
+        st.markdown(NO_PLAN_CSS, unsafe_allow_html=True)
         
         # Add helpful button to navigate to Input Data
         if st.button("Go to Input Data", type="secondary", use_container_width=False):
@@ -46,486 +482,255 @@ def show_nutrition_plan():
             st.rerun()
         return
     
-    # Get the nutrition plan from session state
-    nutrition_plan = st.session_state.nutrition_plan
-    
     # Check if genetic data is available
     has_genetic_data = 'genetic_profile' in st.session_state and st.session_state.genetic_profile is not None
     
-    # Display the plan in tabs for better organization - add a genetic tab if genetic data is used
+    # Display the plan in sections for better organization - add a genetic section if genetic data is used
+    tab_names = ["Overview", "Meal Plan", "Recipes & Tips", "Visual Guides"]
     if has_genetic_data:
-        overview_tab, meal_plan_tab, genetic_tab, recipes_tab, visuals_tab = st.tabs([
-            "Overview", "Meal Plan", "Genetic Optimization", "Recipes & Tips", "Visual Guides"
-        ])
-    else:
-        overview_tab, meal_plan_tab, recipes_tab, visuals_tab = st.tabs([
-            "Overview", "Meal Plan", "Recipes & Tips", "Visual Guides"
-        ])
+        tab_names.insert(2, "Genetic Optimization")
     
-    # Display genetic badge at the top if genetic data is used
-    # Overview tab content
-    with overview_tab:
-                
-        # Add download button at the top of the overview tab
-        html_content = create_nutrition_plan_html()
-        if html_content:
-            st.download_button(
-                label="📥 Download Nutrition Plan",
-                data=html_content,
-                file_name="diabetes_nutrition_plan.html",
-                mime="text/html",
-                key="download_nutrition_plan",
-                help="Download your nutrition plan as an HTML file that you can open in any browser and print to PDF"
-            )             
+    # st.tabs executes every tab body on each rerun, so use a horizontal radio
+    # as the tab selector and render only the active section
+    if st.session_state.get('nutrition_plan_tab') not in tab_names:
+        st.session_state.nutrition_plan_tab = tab_names[0]
+    active_tab = st.radio("Plan section", tab_names, horizontal=True,
+                          key="nutrition_plan_tab", label_visibility="collapsed")
+    
+    # Render only the active section
+    if active_tab == "Overview":
+        _render_overview_tab()
+    elif active_tab == "Meal Plan":
+        _render_meal_plan_tab()
+    elif active_tab == "Genetic Optimization":
+        _render_genetic_tab()
+    elif active_tab == "Recipes & Tips":
+        _render_recipes_tab()
+    elif active_tab == "Visual Guides":
+        _render_visual_guides_tab(has_genetic_data)
+
+def convert_markdown_to_html(markdown_text):
+    """
+    Convert a markdown section of the plan to printable HTML.
+    
+    Args:
+        markdown_text (str): Markdown text of one plan section
         
-        # Display genetic badge at the top if genetic data is used
-            
-        if 'nutrition_overview' in st.session_state:
-            st.markdown(st.session_state.nutrition_overview, unsafe_allow_html=True)
-        else:
-            # Fall back to extracting from the complete plan if separate sections aren't available
-            overview_sections = [s for s in nutrition_plan.split("\n## ") if any(x in s.lower() for x in [
-                "introduction", "overview", "caloric", "macronutrient", "recommended"
-            ])]
-            for section in overview_sections:
-                st.markdown(section, unsafe_allow_html=True)
+    Returns:
+        str: HTML fragment
+    """
+    # Imported here so the page module loads without the markdown parser
+    import markdown
     
-    # Meal Plan tab content
-    with meal_plan_tab:
-        # For genetic plans, add a small indicator that this is genetically optimized
-            
-        if 'nutrition_meal_plan' in st.session_state:
-            st.markdown(st.session_state.nutrition_meal_plan, unsafe_allow_html=True)
-        else:
-            # Fall back to extracting from the complete plan
-            meal_plan_sections = [s for s in nutrition_plan.split("\n## ") if any(x in s.lower() for x in [
-                "meal plan", "sample meal", "day 1", "day 2", "day 3"
-            ])]
-            for section in meal_plan_sections:
-                st.markdown(section, unsafe_allow_html=True)
+    # Clean up HTML tags that might be in the text
+    cleaned_text = TAG_RE.sub('', markdown_text)
     
-    # Genetic Optimization tab (only shown if genetic data is available)
-    if has_genetic_data:
-        with genetic_tab:
-            
-            # If we have the dedicated genetic section from the structured plan, use it
-            if 'nutrition_genetic_section' in st.session_state:
-                st.markdown(st.session_state.nutrition_genetic_section, unsafe_allow_html=True)
-            else:
-                # If no structured genetic section is available, try to find relevant sections
-                # from the complete plan or fall back to the genetic profile
-                genetic_sections = [s for s in nutrition_plan.split("\n## ") if any(x in s.lower() for x in [
-                    "genetic", "gene", "dna", "nutrigenomics", "personalized metabolism"
-                ])]
-                
-                if genetic_sections:
-                    for section in genetic_sections:
-                        st.markdown(section, unsafe_allow_html=True)
-                else:
-                    # If no explicit genetic sections found, display genetic profile information
-                    genetic_profile = st.session_state.genetic_profile
-                    
-                    st.subheader("Your Genetic Profile Summary")
-                    st.info(genetic_profile.get('overall_summary', 'No genetic summary available.'))
-                    
-                    st.subheader("How Your Nutrition Plan Has Been Optimized")
-                    
-                    # Create columns for each major genetic factor
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.markdown("#### Carbohydrate Metabolism")
-                        carb_data = genetic_profile.get("carb_metabolism", {})
-                        st.markdown(f"**Your Profile:** {carb_data.get('carb_sensitivity', 'Normal').title()}")
-                        st.markdown(f"**What this means:** {carb_data.get('explanation', '')}")
-                        
-                        st.markdown("#### Fat Metabolism")
-                        fat_data = genetic_profile.get("fat_metabolism", {})
-                        st.markdown(f"**Your Profile:** {fat_data.get('saturated_fat_sensitivity', 'Normal').title()} sensitivity to saturated fats")
-                        st.markdown(f"**What this means:** {fat_data.get('explanation', '')}")
-                    
-                    with col2:
-                        st.markdown("#### Inflammation Response")
-                        inflammation_data = genetic_profile.get("inflammation_response", {})
-                        st.markdown(f"**Your Profile:** {inflammation_data.get('inflammatory_response', 'Normal').title()}")
-                        st.markdown(f"**What this means:** {inflammation_data.get('explanation', '')}")
-                        
-                        st.markdown("#### Caffeine Metabolism")
-                        caffeine_data = genetic_profile.get("caffeine_metabolism", {})
-                        st.markdown(f"**Your Profile:** {caffeine_data.get('caffeine_metabolism', 'Normal').title()}")
-                        st.markdown(f"**What this means:** {caffeine_data.get('explanation', '')}")
-                
-                    st.subheader("Food Recommendations Based on Your Genetic Profile")
-                    st.markdown("""
-                    | Category | Recommended Foods based on Genetics |
-                    |----------|-------------------------------------|
-                    | **Carbohydrates** | Whole grains, legumes, vegetables (personalized based on your carbohydrate metabolism) |
-                    | **Proteins** | Lean proteins, fatty fish (optimized for your inflammatory profile) |
-                    | **Fats** | Olive oil, avocados, nuts (tailored to your fat metabolism) |
-                    | **Supplements to Consider** | B-vitamins, omega-3 fatty acids (based on your genetic profile) |
-                    """)
-                    
-                    st.subheader("Key Recommendations Based on Your Genetic Profile")
-                    for i, rec in enumerate(genetic_profile.get('key_recommendations', [])):
-                        st.markdown(f"- {rec}")
-                    
-                    # Add genetic nutrition disclaimer
-                    st.markdown("""
-                    ### Genetic Nutrition Disclaimer
-                    
-                    The genetic optimization suggestions provided are based on a limited set of genetic markers and current scientific understanding, which continues to evolve. Individual responses may vary, and these recommendations should be considered as complementary to standard diabetes management practices.
-                    
-                    Always consult with healthcare providers before making significant changes to your diet or lifestyle based on genetic information.
-                    """)
-    
-    # Recipes & Tips tab content
-    with recipes_tab:
-        if 'nutrition_recipes_tips' in st.session_state:
-            st.markdown(st.session_state.nutrition_recipes_tips, unsafe_allow_html=True)
-        else:
-            # Fall back to extracting from the complete plan
-            recipe_sections = [s for s in nutrition_plan.split("\n## ") if any(x in s.lower() for x in [
-                "recipe", "tips", "avoid", "limit", "portion", "guideline", "stabilize"
-            ]) and not any(x in s.lower() for x in ["genetic", "gene", "dna"])]
-            for section in recipe_sections:
-                st.markdown(section, unsafe_allow_html=True)
-            
-    # Visual Guides tab content
-    with visuals_tab:
-        if 'visual_guidance' in st.session_state:
-            display_visual_guidance(has_genetic_data)
-        else:
-            st.warning("No visual guidance has been generated yet.")
+    # Parse the markdown in one pass; nl2br keeps single line breaks as <br>
+    processed_text = markdown.markdown(cleaned_text, extensions=['tables', 'nl2br'])
+    
+    # Enlarge known emojis in a single pass
+    processed_text = EMOJI_RE.sub(r'<span style="font-size: 1.2em;">\1</span>', processed_text)
+    
+    return processed_text
 
-def create_nutrition_plan_html():
-    """
-    Create an HTML version of the nutrition plan that can be easily printed to PDF.
+@st.cache_data(ttl=600, max_entries=256, show_spinner=False)
+def build_nutrition_plan_html(nutrition_plan, overview_content, meal_plan_content, recipes_tips_content, current_date):
     """
-    try:
-        # Import markdown library for conversion
-        import markdown
-        
-        # Get the nutrition plan from session state
-        nutrition_plan = st.session_state.nutrition_plan
-        
-        # Get current date
-        current_date = datetime.now().strftime("%B %d, %Y")
-        
-        # Create HTML content with proper styling for printing
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <title>Diabetes Nutrition Plan</title>
-            <style>
-                @page {{ size: letter; margin: 1cm; }}
-                body {{
-                    font-family: Arial, sans-serif;
-                    line-height: 1.6;
-                    color: #333;
-                    max-width: 800px;
-                    margin: 0 auto;
-                    padding: 20px;
-                }}
-                h1, h2, h3, h4 {{
-                    color: #2c3e50;
-                    margin-top: 1.5em;
-                }}
-                h1 {{
-                    text-align: center;
-                    color: #3498db;
-                    border-bottom: 2px solid #3498db;
-                    padding-bottom: 10px;
-                }}
-                .header {{
-                    text-align: center;
-                    margin-bottom: 30px;
-                }}
-                .date {{
-                    color: #7f8c8d;
-                    font-style: italic;
-                    text-align: center;
-                    margin-bottom: 20px;
-                }}
-                .section {{
-                    margin-bottom: 30px;
-                    page-break-inside: avoid;
-                }}
-                .footer {{
-                    margin-top: 50px;
-                    text-align: center;
-                    font-size: 0.9em;
-                    color: #7f8c8d;
-                    border-top: 1px solid #eee;
-                    padding-top: 20px;
-                }}
-                ul, ol {{
-                    margin-left: 20px;
-                }}
-                table {{
-                    width: 100%;
-                    border-collapse: collapse;
-                    margin: 20px 0;
-                }}
-                table, th, td {{
-                    border: 1px solid #ddd;
-                }}
-                th, td {{
-                    padding: 12px;
-                    text-align: left;
-                }}
-                th {{
-                    background-color: #f2f2f2;
-                }}
-                hr {{
-                    border: 0;
-                    height: 1px;
-                    background: #ddd;
-                    margin: 20px 0;
-                }}
-                .emoji {{
-                    font-size: 1.2em;
-                }}
-                @media print {{
-                    body {{
-                        font-size: 12pt;
-                    }}
-                    h1 {{
-                        font-size: 18pt;
-                    }}
-                    h2 {{
-                        font-size: 16pt;
-                    }}
-                    h3 {{
-                        font-size: 14pt;
-                    }}
-                    .no-print {{
-                        display: none;
-                    }}
-                    @page {{
-                        margin: 2cm;
-                    }}
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>Personalized Diabetes Nutrition Plan</h1>
-                <p class="date">Generated on {current_date}</p>
-            </div>
-        """
-        
-        # Function to convert markdown to HTML
-        def convert_markdown_to_html(markdown_text):
-            # Clean up HTML tags that might be in the text
-            cleaned_text = re.sub(r'<.*?>', '', markdown_text)
-            
-            # Process bold text manually (** ** format)
-            def process_bold(text):
-                # Replace **text** with <strong>text</strong>
-                bold_pattern = r'\*\*(.*?)\*\*'
-                return re.sub(bold_pattern, r'<strong>\1</strong>', text)
-            
-            # Process headers manually (# format)
-            def process_headers(text):
-                # Replace # Header with <h1>Header</h1>, ## Header with <h2>Header</h2>, etc.
-                lines = []
-                for line in text.split('\n'):
-                    if line.strip().startswith('#'):
-                        # Count the number of # characters
-                        header_level = 0
-                        for char in line:
-                            if char == '#':
-                                header_level += 1
-                            else:
-                                break
-                        
-                        if header_level > 0 and header_level <= 6:
-                            # Extract the header text
-                            header_text = line[header_level:].strip()
-                            # Create the HTML header
-                            line = f'<h{header_level}>{header_text}</h{header_level}>'
-                    lines.append(line)
-                return '\n'.join(lines)
-            
-            # Process lists manually (- or * format)
-            def process_lists(text):
-                lines = []
-                in_list = False
-                
-                for line in text.split('\n'):
-                    stripped = line.strip()
-                    if stripped.startswith('- ') or stripped.startswith('* '):
-                        if not in_list:
-                            lines.append('<ul>')
-                            in_list = True
-                        # Extract the list item text
-                        item_text = stripped[2:].strip()
-                        lines.append(f'<li>{item_text}</li>')
-                    else:
-                        if in_list:
-                            lines.append('</ul>')
-                            in_list = False
-                        lines.append(line)
-                
-                if in_list:
-                    lines.append('</ul>')
-                
-                return '\n'.join(lines)
-            
-            # Convert markdown tables to HTML tables
-            def process_tables(text):
-                table_pattern = r'\|(.+)\|\n\|[-:| ]+\|\n((?:\|.+\|\n)+)'
-                
-                def table_replacement(match):
-                    header = match.group(1).strip()
-                    rows = match.group(2).strip()
-                    
-                    # Process header
-                    header_cells = [cell.strip() for cell in header.split('|')]
-                    header_html = '<tr>' + ''.join([f'<th>{cell}</th>' for cell in header_cells if cell]) + '</tr>'
-                    
-                    # Process rows
-                    rows_html = ''
-                    for row in rows.split('\n'):
-                        if '|' in row:
-                            cells = [cell.strip() for cell in row.split('|')]
-                            rows_html += '<tr>' + ''.join([f'<td>{cell}</td>' for cell in cells if cell]) + '</tr>'
-                    
-                    return f'<table border="1" cellpadding="5" cellspacing="0" style="border-collapse: collapse;">{header_html}{rows_html}</table>'
-                
-                return re.sub(table_pattern, table_replacement, text, flags=re.MULTILINE)
-            
-            # Process horizontal rules (---)
-            def process_hr(text):
-                hr_pattern = r'^---+$'
-                return re.sub(hr_pattern, '<hr>', text, flags=re.MULTILINE)
-            
-            # Process paragraphs and line breaks
-            def process_paragraphs(text):
-                # Split text into paragraphs (double line breaks)
-                paragraphs = text.split('\n\n')
-                processed_paragraphs = []
-                
-                for paragraph in paragraphs:
-                    # Skip empty paragraphs
-                    if not paragraph.strip():
-                        continue
-                    
-                    # Check if this is a special element (header, list, table, etc.)
-                    if paragraph.strip().startswith('#') or paragraph.strip().startswith('|') or \
-                       paragraph.strip().startswith('- ') or paragraph.strip().startswith('* ') or \
-                       paragraph.strip() == '---':
-                        # Don't wrap these in <p> tags
-                        processed_paragraphs.append(paragraph)
-                    else:
-                        # Handle line breaks within paragraphs
-                        lines = paragraph.split('\n')
-                        processed_lines = []
-                        
-                        for line in lines:
-                            if line.strip():
-                                processed_lines.append(line)
-                        
-                        # Join lines with <br> tags and wrap in <p> tags
-                        if processed_lines:
-                            processed_paragraph = '<p>' + '<br>'.join(processed_lines) + '</p>'
-                            processed_paragraphs.append(processed_paragraph)
-                
-                return '\n'.join(processed_paragraphs)
-            
-            # Apply all the processing functions
-            processed_text = cleaned_text
-            processed_text = process_bold(processed_text)
-            processed_text = process_headers(processed_text)
-            processed_text = process_lists(processed_text)
-            processed_text = process_tables(processed_text)
-            processed_text = process_hr(processed_text)
-            processed_text = process_paragraphs(processed_text)
-            
-            # Replace emoji codes with actual emojis
-            emoji_map = {
-                '🔥': '🔥', '🥗': '🥗', '⏱️': '⏱️', '🌾': '🌾',
-                '🥩': '🥩', '🥑': '🥑', '🥦': '🥦', '🍎': '🍎',
-                '🥤': '🥤', '🌞': '🌞', '🥪': '🥪', '🍲': '🍲',
-                '🍏': '🍏', '🍽️': '🍽️', '🥛': '🥛', '📉': '📉', 
-                '📈': '📈', '⏰': '⏰', '🥕': '🥕', '🍞': '🍞',
-                '🍟': '🍟', '🥓': '🥓', '🍰': '🍰', '☕': '☕',
-                '🍗': '🍗', '🫒': '🫒', '🫘': '🫘', '🐟': '🐟',
-                '🫐': '🫐', '🥬': '🥬'
-            }
-            
-            # Replace emoji text with actual emojis
-            for emoji_text, emoji in emoji_map.items():
-                processed_text = processed_text.replace(emoji_text, f'<span style="font-size: 1.2em;">{emoji}</span>')
-            
-            return processed_text
+    Build the printable HTML document for a nutrition plan.
+    
+    Results are cached for ten minutes, so rerenders of the page reuse the
+    document until the plan text or the date changes. The cache is shared by
+    all sessions, so it is bounded in both age and size.
+    
+    Args:
+        nutrition_plan (str): Complete nutrition plan markdown
+        overview_content (str): Overview section, or None to extract it from the plan
+        meal_plan_content (str): Meal plan section, or None to extract it from the plan
+        recipes_tips_content (str): Recipes & tips section, or None to extract it from the plan
+        current_date (str): Date shown in the document header
         
-        # Add Overview section
-        html_content += '<div class="section"><h2>Overview</h2>'
-        if 'nutrition_overview' in st.session_state:
-            overview_content = st.session_state.nutrition_overview
-            # Remove HTML tags but keep the content
-            clean_overview = re.sub(r'<.*?>', '', overview_content)
-            html_content += convert_markdown_to_html(clean_overview)
-        else:
-            # Fall back to extracting from the complete plan
-            overview_sections = [s for s in nutrition_plan.split("\n## ") if any(x in s.lower() for x in [
-                "introduction", "overview", "caloric", "macronutrient", "recommended"
-            ])]
-            for section in overview_sections:
-                html_content += convert_markdown_to_html(section)
-        html_content += '</div>'
+    Returns:
+        str: Complete HTML document
+    """
+    # Fill the date into the static document head
+    parts = [HTML_HEAD.replace("__DATE__", current_date)]
+    
+    # Split the complete plan once, and only if a section has to fall back to it
+    if None in (overview_content, meal_plan_content, recipes_tips_content):
+        overview_sections, meal_plan_sections, _, recipe_sections = split_plan_sections(nutrition_plan)
+    
+    # Add Overview section
+    parts.append('<div class="section"><h2>Overview</h2>')
+    if overview_content is not None:
+        # convert_markdown_to_html strips any HTML tags itself
+        parts.append(convert_markdown_to_html(overview_content))
+    else:
+        # Fall back to extracting from the complete plan
+        for section in overview_sections:
+            parts.append(convert_markdown_to_html(section))
+    parts.append('</div>')
+    
+    # Add Meal Plan section
+    parts.append('<div class="section"><h2>Meal Plan</h2>')
+    if meal_plan_content is not None:
+        # convert_markdown_to_html strips any HTML tags itself
+        parts.append(convert_markdown_to_html(meal_plan_content))
+    else:
+        # Fall back to extracting from the complete plan
+        for section in meal_plan_sections:
+            parts.append(convert_markdown_to_html(section))
+    parts.append('</div>')
+    
+    # Add Recipes & Tips section
+    parts.append('<div class="section"><h2>Recipes & Tips</h2>')
+    if recipes_tips_content is not None:
+        # convert_markdown_to_html strips any HTML tags itself
+        parts.append(convert_markdown_to_html(recipes_tips_content))
+    else:
+        # Fall back to extracting from the complete plan
+        for section in recipe_sections:
+            parts.append(convert_markdown_to_html(section))
+    parts.append('</div>')
+    
+    # Add footer
+    parts.append(HTML_FOOTER)
+    
+    return "".join(parts)
+
+def nutrition_plan_html_builder():
+    """
+    Bind the current plan to build_nutrition_plan_html for a deferred download.
+    
+    Streamlit runs a callable download on a server thread without access to
+    session state, so the plan sections and the date are read here, during
+    the script run.
+    
+    Returns:
+        functools.partial: Zero-argument callable that returns the HTML document
+    """
+    from datetime import datetime
+    
+    return partial(
+        build_nutrition_plan_html,
+        st.session_state.nutrition_plan,
+        st.session_state.get('nutrition_overview'),
+        st.session_state.get('nutrition_meal_plan'),
+        st.session_state.get('nutrition_recipes_tips'),
+        datetime.now().strftime("%B %d, %Y")
+    )
+
+def genetic_rule_foods(rules, genetic_profile):
+    """
+    Collect the foods whose genetic rule is triggered by a profile.
+    
+    Args:
+        rules (tuple): Rules as (factor, field, triggering levels, foods)
+        genetic_profile (dict): Genetic profile
         
-        # Add Meal Plan section
-        html_content += '<div class="section"><h2>Meal Plan</h2>'
-        if 'nutrition_meal_plan' in st.session_state:
-            meal_plan_content = st.session_state.nutrition_meal_plan
-            # Remove HTML tags but keep the content
-            clean_meal_plan = re.sub(r'<.*?>', '', meal_plan_content)
-            html_content += convert_markdown_to_html(clean_meal_plan)
-        else:
-            # Fall back to extracting from the complete plan
-            meal_plan_sections = [s for s in nutrition_plan.split("\n## ") if any(x in s.lower() for x in [
-                "meal plan", "sample meal", "day 1", "day 2", "day 3"
-            ])]
-            for section in meal_plan_sections:
-                html_content += convert_markdown_to_html(section)
-        html_content += '</div>'
+    Returns:
+        list: FoodItems with the user's level filled into their reasons
+    """
+    foods = []
+    for factor, field, levels, rule_foods in rules:
+        level = (genetic_profile.get(factor) or EMPTY_FACTOR).get(field, '')
+        if level in levels:
+            foods.extend(food._replace(reason=food.reason.format(level=level)) for food in rule_foods)
+    return foods
+
+def food_list_html(foods):
+    """
+    Build one HTML block listing foods with their icons and explanations.
+    
+    Args:
+        foods (list): FoodItem entries to list
         
-        # Add Recipes & Tips section
-        html_content += '<div class="section"><h2>Recipes & Tips</h2>'
-        if 'nutrition_recipes_tips' in st.session_state:
-            recipes_tips_content = st.session_state.nutrition_recipes_tips
-            # Remove HTML tags but keep the content
-            clean_recipes_tips = re.sub(r'<.*?>', '', recipes_tips_content)
-            html_content += convert_markdown_to_html(clean_recipes_tips)
-        else:
-            # Fall back to extracting from the complete plan
-            recipe_sections = [s for s in nutrition_plan.split("\n## ") if any(x in s.lower() for x in [
-                "recipe", "tips", "avoid", "limit", "portion", "guideline", "stabilize"
-            ]) and not any(x in s.lower() for x in ["genetic", "gene", "dna"])]
-            for section in recipe_sections:
-                html_content += convert_markdown_to_html(section)
-        html_content += '</div>'
+    Returns:
+        str: HTML rows laid out with flexbox, with names and reasons escaped
+    """
+    return "".join(
+        f'<div style="display: flex; align-items: center; gap: 12px; margin: 6px 0;">'
+        f'<span style="font-size: 36px;">{food.icon}</span>'
+        f'<div><b>{html.escape(food.name)}</b>: {html.escape(food.reason)}</div>'
+        f'</div>'
+        for food in foods
+    )
+
+def genetic_profile_digest(genetic_profile):
+    """
+    Compute a stable fingerprint of a genetic profile for cache keys.
+    
+    Args:
+        genetic_profile (dict): Genetic profile, possibly empty
         
-        # Add footer
-        html_content += """
-            <div class="footer">
-                <p>This nutrition plan is personalized based on your health information and is intended as a guide.</p>
-                <p>Always consult with healthcare providers before making significant changes to your diet.</p>
-            </div>
-        </body>
-        </html>
-        """
+    Returns:
+        str: Hex digest of the profile serialized with sorted keys
+    """
+    serialized = json.dumps(genetic_profile, sort_keys=True, default=str)
+    return hashlib.md5(serialized.encode("utf-8")).hexdigest()
+
+def build_visual_guidance(cultural_preferences, food_preferences, dietary_restrictions, genetic_profile):
+    """
+    Build the image and HTML blocks shown in the Visual Guides section.
+    
+    Args:
+        cultural_preferences (str): Cultural food preferences
+        food_preferences (tuple): Food preferences
+        dietary_restrictions (frozenset): Dietary restrictions
+        genetic_profile (dict): Genetic profile, empty when not available
         
-        return html_content
-    except Exception as e:
-        st.error(f"An error occurred while generating the file: {str(e)}")
-        # Provide a simpler alternative
-        st.info("You can save this page as a PDF using your browser's print function (Ctrl+P or Cmd+P) and selecting 'Save as PDF'.")
-        return None
+    Returns:
+        dict: PNG image and HTML strings ready to render
+    """
+    # Imported here so matplotlib only loads once the Visual Guides are shown
+    from utils.visualization import create_visual_guides
+    
+    is_plant_based = bool(dietary_restrictions & PLANT_BASED_DIETS)
+    
+    # Read the genetic factors used for the note once
+    carb_sensitivity = (genetic_profile.get('carb_metabolism') or EMPTY_FACTOR).get('carb_sensitivity', 'normal')
+    fat_sensitivity = (genetic_profile.get('fat_metabolism') or EMPTY_FACTOR).get('saturated_fat_sensitivity', 'normal')
+    
+    # Add genetic-specific note if genetic data is available
+    genetic_note = None
+    if genetic_profile:
+        # Look up genetic-specific recommendations
+        carb_advice = CARB_ADVICE.get(carb_sensitivity, CARB_ADVICE_DEFAULT)
+        fat_advice = FAT_ADVICE.get(fat_sensitivity, FAT_ADVICE_DEFAULT)
+        genetic_note = GENETIC_NOTE_TEMPLATE.format(carb=carb_advice, fat=fat_advice)
+    
+    # Start from the shared list of foods to limit
+    limit_foods = list(BASE_LIMIT_FOODS)
+    
+    # Add conditional item based on dietary restrictions
+    limit_foods.append(PROCESSED_FOODS if is_plant_based else PROCESSED_MEATS)
+    limit_foods.append(SWEETS)
+    
+    # Customize based on genetic profile if available (e.g. caffeine for slow metabolizers)
+    if genetic_profile:
+        limit_foods.extend(genetic_rule_foods(GENETIC_LIMIT_RULES, genetic_profile))
+    
+    # Start from the shared list of recommended foods
+    choose_foods = list(BASE_CHOOSE_FOODS)
+    
+    # Customize protein examples based on dietary preferences
+    choose_foods.append(PLANT_PROTEIN if is_plant_based else ANIMAL_PROTEIN)
+    
+    # Customize fat and legume examples based on cultural preferences
+    choose_foods.extend(
+        cultural_food if keyword in cultural_preferences else default_food
+        for keyword, cultural_food, default_food in CULTURAL_FOOD_SWAPS
+    )
+    
+    # Add genetic-specific food recommendations if available (anti-inflammatory, folate-rich)
+    if genetic_profile:
+        choose_foods.extend(genetic_rule_foods(GENETIC_CHOOSE_RULES, genetic_profile))
+    
+    return {
+        'visual_guides': create_visual_guides(cultural_preferences, food_preferences, dietary_restrictions),
+        'genetic_note': genetic_note,
+        'limit_html': food_list_html(limit_foods),
+        'choose_html': food_list_html(choose_foods)
+    }
 
 def display_visual_guidance(has_genetic_data=False):
     """
@@ -537,197 +742,60 @@ def display_visual_guidance(has_genetic_data=False):
     # Get user preferences from health_data if available
     health_data = st.session_state.health_data
     
-    # Extract relevant preferences
-    food_preferences = health_data.get('food_preferences', [])
-    dietary_restrictions_str = health_data.get('dietary_restrictions', '')
-    dietary_restrictions = [restriction.strip() for restriction in dietary_restrictions_str.split(',') if restriction.strip()]
-    cultural_preferences = health_data.get('cultural_preferences', '')
+    # Extract relevant preferences as hashable values so the cached builders can key on them
+    food_preferences = tuple(health_data.get('food_preferences', []))
+    dietary_restrictions_str = health_data.get('dietary_restrictions', '') or ''
+    dietary_restrictions = frozenset(restriction for restriction in RESTRICTION_SPLIT_RE.split(dietary_restrictions_str.strip()) if restriction)
+    cultural_preferences = health_data.get('cultural_preferences', '') or ''
+    genetic_profile = (st.session_state.get('genetic_profile') or {}) if has_genetic_data else {}
     
-    # Create and display the portion guide
-    portion_guide = create_enhanced_portion_guide(cultural_preferences, food_preferences, dietary_restrictions)
-    if portion_guide is not None:
-        st.pyplot(portion_guide)
-    
-    # Add educational note about the portion guide
-    st.markdown("""
-    <div style="background-color: #e8f5e9; padding: 15px; border-radius: 10px; margin-top: 20px;">
-        <h4 style="color: #2e7d32;">How to Use This Portion Guide</h4>
-        <ul>
-            <li><strong>Half your plate</strong> should be filled with non-starchy vegetables</li>
-            <li><strong>One quarter</strong> should contain lean proteins</li>
-            <li><strong>One quarter</strong> should have complex carbohydrates</li>
-            <li>Include a small serving of fruit and/or dairy on the side</li>
-            <li>Add healthy fats in small amounts (olive oil, avocado, nuts)</li>
-        </ul>
-    </div>
-    """, unsafe_allow_html=True)
+    # Rebuild the visuals only when the preferences or genetic profile change
+    cache_key = (
+        cultural_preferences,
+        food_preferences,
+        dietary_restrictions,
+        has_genetic_data,
+        genetic_profile_digest(genetic_profile)
+    )
+    if st.session_state.get('_visuals_cache_key') != cache_key:
+        st.session_state._visuals_cache = build_visual_guidance(
+            cultural_preferences, food_preferences, dietary_restrictions, genetic_profile
+        )
+        st.session_state._visuals_cache_key = cache_key
+    visuals = st.session_state._visuals_cache
     
-    # Add genetic-specific note if genetic data is available
-    if has_genetic_data and 'genetic_profile' in st.session_state:
-        genetic_profile = st.session_state.genetic_profile
-        
-        # Get carb sensitivity
-        carb_sensitivity = genetic_profile.get('carb_metabolism', {}).get('carb_sensitivity', 'normal')
-        
-        # Get fat sensitivity
-        fat_sensitivity = genetic_profile.get('fat_metabolism', {}).get('saturated_fat_sensitivity', 'normal')
-        
-        # Create genetic-specific recommendations
-        carb_advice = "Focus on complex carbohydrates with fiber" if carb_sensitivity == "high" else \
-                      "Be mindful of carbohydrate quality and portion size" if carb_sensitivity == "higher" else \
-                      "Balance your carbohydrate intake according to the portion guide"
-                      
-        fat_advice = "Limit saturated fats; choose plant oils & lean proteins" if fat_sensitivity == "high" else \
-                     "Moderate your saturated fat intake; focus on unsaturated fats" if fat_sensitivity == "moderate" else \
-                     "Include a balanced mix of fats, emphasizing unsaturated sources"
-        
-        # Display genetic-specific advice
-        st.markdown("""
-        <div style="background-color: #E8EAF6; padding: 15px; border-radius: 10px; margin-top: 20px; border-left: 5px solid #3F51B5;">
-            <h4 style="color: #3F51B5;">Genetic Optimization Notes</h4>
-            <ul>
-                <li><strong>Carbohydrates:</strong> """ + carb_advice + """</li>
-                <li><strong>Fats:</strong> """ + fat_advice + """</li>
-            </ul>
-        </div>
-        """, unsafe_allow_html=True)
+    # Display the portion, glucose and food guides as a single image
+    if visuals['visual_guides'] is not None:
+        st.image(visuals['visual_guides'], width="stretch")
     
-    # Add a separator
-    st.markdown("---")
+    # Add educational note about the portion guide
+    st.markdown(PORTION_NOTE_HTML, unsafe_allow_html=True)
     
-    # Display the blood glucose target range visualization
-    glucose_guide = create_enhanced_glucose_guide()
-    if glucose_guide is not None:
-        st.pyplot(glucose_guide)
+    # Display genetic-specific advice if genetic data is available
+    if visuals['genetic_note']:
+        st.markdown(visuals['genetic_note'], unsafe_allow_html=True)
     
     # Add a separator
     st.markdown("---")
     
-    # Display foods to avoid visual
-    foods_to_avoid = create_foods_to_avoid_visual(dietary_restrictions)
-    if foods_to_avoid is not None:
-        st.pyplot(foods_to_avoid)
-    
     # Create a container for the "Foods to Limit" section
     limit_container = st.container()
     with limit_container:
         # Add a custom header with red background
-        st.markdown(
-            """
-            <div style="background-color: #ffebee; padding: 15px; border-radius: 10px;">
-                <h4 style="color: #c62828; margin-top: 0;">Why Limit These Foods?</h4>
-            </div>
-            """, 
-            unsafe_allow_html=True
-        )
-        
-        # Create a list of foods to limit with icons and explanations
-        limit_foods = [
-            {"icon": "🍞", "name": "White Bread and Refined Grains", "reason": "Cause rapid blood sugar spikes"},
-            {"icon": "🥤", "name": "Sugary Drinks", "reason": "High in simple sugars with little nutritional value"},
-            {"icon": "🍟", "name": "Fried Foods", "reason": "High in unhealthy fats that can worsen insulin resistance"}
-        ]
-        
-        # Add conditional item based on dietary restrictions
-        if dietary_restrictions and ("Vegetarian" in dietary_restrictions or "Vegan" in dietary_restrictions):
-            limit_foods.append({"icon": "🥫", "name": "Processed Foods", "reason": "Often high in sodium, sugar, and unhealthy additives"})
-        else:
-            limit_foods.append({"icon": "🥓", "name": "Processed Meats", "reason": "High in sodium and unhealthy fats"})
-        
-        limit_foods.append({"icon": "🍰", "name": "Sweets & Desserts", "reason": "High in sugar and calories with minimal nutrition"})
-        
-        # Customize based on genetic profile if available
-        if has_genetic_data and 'genetic_profile' in st.session_state:
-            genetic_profile = st.session_state.genetic_profile
-            
-            # Add caffeine warning if slow metabolizer
-            caffeine_metabolism = genetic_profile.get('caffeine_metabolism', {}).get('caffeine_metabolism', '')
-            if caffeine_metabolism in ['slow', 'very slow']:
-                limit_foods.append({"icon": "☕", "name": "Caffeine", "reason": f"Your genetic profile indicates {caffeine_metabolism} caffeine metabolism"})
-        
-        # Display each food item
-        for food in limit_foods:
-            cols = st.columns([1, 5])
-            with cols[0]:
-                st.markdown(f"<span style='font-size: 36px;'>{food['icon']}</span>", unsafe_allow_html=True)
-            with cols[1]:
-                st.markdown(f"**{food['name']}**: {food['reason']}")
+        st.markdown(LIMIT_HEADER_HTML, unsafe_allow_html=True)
+        st.markdown(visuals['limit_html'], unsafe_allow_html=True)
     
     # Add a separator
     st.markdown("---")
     
-    # Display recommended foods visual
-    recommended_foods = create_recommended_foods_visual(cultural_preferences, dietary_restrictions)
-    if recommended_foods is not None:
-        st.pyplot(recommended_foods)
-    
     # Create a container for the "Foods to Choose" section
     choose_container = st.container()
     with choose_container:
         # Add a custom header with green background
-        st.markdown(
-            """
-            <div style="background-color: #e8f5e9; padding: 0px; border-radius: 0px;">
-                <h4 style="color: #2e7d32; margin-top: 10;">Why Choose These Foods?</h4>
-            </div>
-            """, 
-            unsafe_allow_html=True
-        )
-        
-        # Create a list of recommended foods with icons and explanations
-        choose_foods = [
-            {"icon": "🌾", "name": "Whole Grains", "reason": "High in fiber which slows sugar absorption into the bloodstream"},
-            {"icon": "🍎", "name": "Fresh Fruit", "reason": "Contains natural sugars with fiber, vitamins, and antioxidants"}
-        ]
-        
-        # Customize protein examples based on dietary preferences
-        if dietary_restrictions and "Vegetarian" in dietary_restrictions or "Vegan" in dietary_restrictions:
-            choose_foods.append({"icon": "🥚", "name": "Protein", "reason": "Options like tofu, legumes, and eggs provide protein without raising blood sugar"})
-        else:
-            choose_foods.append({"icon": "🍗", "name": "Protein", "reason": "Helps maintain steady blood sugar and promotes satiety"})
-        
-        # Customize fat examples based on cultural preferences
-        if cultural_preferences and "Mediterranean" in cultural_preferences:
-            choose_foods.append({"icon": "🫒", "name": "Olive Oil", "reason": "Mediterranean staple that improves insulin sensitivity"})
-        else:
-            choose_foods.append({"icon": "🥑", "name": "Healthy Fats", "reason": "Improves insulin sensitivity and slows digestion of carbohydrates"})
-        
-        # Customize legumes example based on cultural preferences
-        if cultural_preferences and "Latin" in cultural_preferences:
-            choose_foods.append({"icon": "🫘", "name": "Beans", "reason": "Latin American staple high in protein and fiber with minimal impact on blood glucose"})
-        else:
-            choose_foods.append({"icon": "🫘", "name": "Legumes", "reason": "High in protein and fiber with minimal impact on blood glucose"})
-        
-        # Add genetic-specific food recommendations if available
-        if has_genetic_data and 'genetic_profile' in st.session_state:
-            genetic_profile = st.session_state.genetic_profile
-            
-            # Add anti-inflammatory foods if needed
-            inflammation_response = genetic_profile.get('inflammation_response', {}).get('inflammatory_response', '')
-            if inflammation_response in ['elevated', 'moderate']:
-                choose_foods.append({"icon": "🐟", "name": "Fatty Fish", "reason": f"Rich in omega-3s to help manage your {inflammation_response} inflammatory response"})
-                choose_foods.append({"icon": "🫐", "name": "Berries", "reason": "High in antioxidants that help reduce inflammation"})
-            
-            # Add folate-rich foods if needed
-            folate_processing = genetic_profile.get('vitamin_metabolism', {}).get('folate_processing', '')
-            if folate_processing in ['reduced', 'significantly reduced']:
-                choose_foods.append({"icon": "🥬", "name": "Leafy Greens", "reason": f"Rich in folate to support your {folate_processing} folate processing ability"})
-        
-        # Display each food item
-        for food in choose_foods:
-            cols = st.columns([1, 5])
-            with cols[0]:
-                st.markdown(f"<span style='font-size: 36px;'>{food['icon']}</span>", unsafe_allow_html=True)
-            with cols[1]:
-                st.markdown(f"**{food['name']}**: {food['reason']}")
+        st.markdown(CHOOSE_HEADER_HTML, unsafe_allow_html=True)
+        st.markdown(visuals['choose_html'], unsafe_allow_html=True)
                 
     # Add a disclaimer about genetic optimization if applicable
     if has_genetic_data:
         st.markdown("---")
-        st.markdown("""
-        <div style="background-color: #F3E5F5; padding: 15px; border-radius: 10px; margin-top: 20px; border-left: 5px solid #9C27B0;">
-            <h4 style="color: #9C27B0;">Genetic Nutrition Disclaimer</h4>
-            <p>The genetic optimization suggestions provided are based on a limited set of genetic markers and current scientific understanding, which continues to evolve. Individual responses may vary, and these recommendations should be considered as complementary to standard diabetes management practices.</p>
-            <p>Always consult with healthcare providers before making significant changes to your diet or lifestyle based on genetic information.</p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(GENETIC_DISCLAIMER_HTML, unsafe_allow_html=True)
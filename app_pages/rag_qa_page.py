@@ -5,98 +5,185 @@ with answers retrieved from PDF documents using a RAG system with Pinecone.
 """
 
 import os
+import time
+import markdown
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
 from pathlib import Path
 
-from utils.rag_system import find_similar_chunks, generate_response, ingest_documents
-from rag.pinecone_utils import initialize_pinecone, delete_index
+from utils.rag_system import find_similar_chunks, find_similar_chunks_cached, generate_response, ingest_documents, normalize_question
+from rag.pinecone_utils import DEFAULT_INDEX_NAME, EMBEDDING_DIMENSIONS, initialize_pinecone, delete_index
 
-def show_rag_qa_page():
-    """Display the RAG Q&A interface."""
-    # Add custom CSS to style the page similar to the input data page
-    st.markdown("""
-    <style>
-    /* Style for the active tab (primary button) */
-    .stButton button[kind="primary"] {
-        background-color: #87CEEB !important; /* Sky blue */
-        color: #333333 !important; /* Dark gray for text */
-        border-color: #000000 !important; /* Black border */
-        font-weight: 600 !important;
-    }
+# Number of recent questions kept in the Q&A history
+RAG_HISTORY_SIZE = 10
+
+# How often the page checks on a running document ingestion (seconds)
+INGEST_POLL_SECONDS = 0.5
+
+# Example questions shown in the "About this Q&A System" expander
+EXAMPLE_QUESTIONS = (
+    "What is insulin?",
+    "What is insulin resistance?",
+    "What are normal blood glucose levels?",
+    "How does sleep affect glucose levels?",
+    "What is the root cause of Type 2 diabetes?",
+    "How does fiber affect blood glucose levels?",
+    "How does insulin affect blood glucose levels?",
+    "How does exercise affect blood glucose levels?",
+    "What's the best breakfast for stable glucose levels?",
+    "What is glucose and why is it important for the body?",
+    "How do glucose spikes affect energy levels and mood?",
+    "What's the relationship between glucose and heart health?",
+    "What's the connection between glucose and inflammation?",
+    "What's the relationship between carbohydrates and glucose?",
+    "What's the connection between glucose levels and diabetes?",
+    "What is the link between glucose spikes and inflammatory conditions?",
+    "How might I modify my breakfast to reduce morning glucose spikes?",
+    "What are the best strategies to prevent glucose spikes after meals?",
+    "What are the main differences between Type 1 and Type 2 diabetes?",
+    "What's the difference between glucose, fructose, and sucrose?",
+    "How does eating food in the right order help with glucose management?",
+)
+
+# The example list is static, so it is rendered to HTML once at import
+EXAMPLE_QUESTIONS_HEADER_HTML = "<h5 style='color:#20a7db; margin-top:0; border-bottom:2px solid #D3D3D3; padding-bottom:10px;'>Example Questions</h5>"
+EXAMPLE_QUESTIONS_HTML = markdown.markdown("\n".join(f"- {q}" for q in EXAMPLE_QUESTIONS))
+
+# Page styles, matching the look of the input data page
+RAG_PAGE_CSS = """
+<style>
+/* Style for the active tab (primary button) */
+.stButton button[kind="primary"] {
+    background-color: #87CEEB !important; /* Sky blue */
+    color: #333333 !important; /* Dark gray for text */
+    border-color: #000000 !important; /* Black border */
+    font-weight: 600 !important;
+}
+
+/* Hover effect for inactive tabs */
+.stButton button[kind="secondary"]:hover {
+    background-color: #E5E4E2 !important; /* Very light blue on hover */
+    color: #333333 !important; /* Dark gray for text */
+    border-color: #000000 !important; /* Black border */
+    font-weight: 600 !important;
+}
+
+/* Style for the form container */
+.stApp {
+    background-color: #f8f9fa;
+}
+
+/* Style for input fields */
+.stNumberInput > div, 
+.stSelectbox > div,
+.stMultiSelect > div,
+.stTextArea > div,
+.stTextInput > div {
+    background-color: #f8f9fa !important;
+    border-radius: 10px !important;
+}
+
+/* Style for input fields */
+.stNumberInput input,
+.stSelectbox input,
+.stMultiSelect input,
+.stTextArea textarea,
+.stTextInput input {
+    background-color: white !important;
+    border-radius: 10px !important;
+    border: none !important;
+    padding: 10px !important;
+}
+
+/* Style for labels */
+.stNumberInput label, 
+.stSelectbox label,
+.stMultiSelect label,
+.stTextArea label,
+.stTextInput label {
+    font-weight: 500 !important;
+    color: #333 !important;
+    font-size: 0.9rem !important;
+}
+</style>
+"""
+
+@st.cache_resource(show_spinner=False)
+def get_pinecone_client():
+    """
+    Get a Pinecone client shared across reruns and sessions.
     
-    /* Hover effect for inactive tabs */
-    .stButton button[kind="secondary"]:hover {
-        background-color: #E5E4E2 !important; /* Very light blue on hover */
-        color: #333333 !important; /* Dark gray for text */
-        border-color: #000000 !important; /* Black border */
-        font-weight: 600 !important;
-    }
+    Failed initializations raise and are not cached, so a fixed
+    configuration is picked up on the next rerun.
     
-    /* Style for the form container */
-    .stApp {
-        background-color: #f8f9fa;
-    }
+    Returns:
+        pinecone.Pinecone: Initialized Pinecone client
+    """
+    return initialize_pinecone()
+
+@st.cache_resource(show_spinner=False)
+def get_ingest_executor():
+    """
+    Get the single-worker executor that runs document ingestion.
     
-    /* Style for input fields */
-    .stNumberInput > div, 
-    .stSelectbox > div,
-    .stMultiSelect > div,
-    .stTextArea > div,
-    .stTextInput > div {
-        background-color: #f8f9fa !important;
-        border-radius: 10px !important;
-    }
+    One worker per process means concurrent sessions queue up instead of
+    ingesting the same documents in parallel.
     
-    /* Style for input fields */
-    .stNumberInput input,
-    .stSelectbox input,
-    .stMultiSelect input,
-    .stTextArea textarea,
-    .stTextInput input {
-        background-color: white !important;
-        border-radius: 10px !important;
-        border: none !important;
-        padding: 10px !important;
-    }
+    Returns:
+        ThreadPoolExecutor: Executor for ingestion jobs
+    """
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="rag-ingest")
+
+@st.cache_data(ttl=300, show_spinner=False)
+def index_has_documents(index_name):
+    """
+    Check whether a Pinecone index exists and contains vectors that can be queried.
     
-    /* Style for labels */
-    .stNumberInput label, 
-    .stSelectbox label,
-    .stMultiSelect label,
-    .stTextArea label,
-    .stTextInput label {
-        font-weight: 500 !important;
-        color: #333 !important;
-        font-size: 0.9rem !important;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    Uses the index stats endpoint instead of a test query, so no embedding
+    is generated. The result is cached for five minutes. Errors reaching
+    Pinecone are raised rather than returned, so they are not cached.
+    
+    Args:
+        index_name (str): Name of the Pinecone index
+        
+    Returns:
+        bool: True if the index has at least one vector of the current embedding
+            size; an index with another dimension needs to be re-ingested
+    """
+    pc = get_pinecone_client()
+    # The index might not exist yet
+    if not pc.has_index(index_name):
+        return False
+    stats = pc.Index(index_name).describe_index_stats()
+    return stats.dimension == EMBEDDING_DIMENSIONS and stats.total_vector_count > 0
+
+def show_rag_qa_page():
+    """Display the RAG Q&A interface."""
+    # Add custom CSS to style the page similar to the input data page
+    st.markdown(RAG_PAGE_CSS, unsafe_allow_html=True)
     
     st.markdown("<h4 style='font-size: 22px; font-family: inherit;'>Ask Questions About Diabetes & Nutrition</h4>", unsafe_allow_html=True)
     
     # Check if Pinecone is properly configured
-    index_name = "diabetes-nutrition"
+    index_name = DEFAULT_INDEX_NAME
     pinecone_configured = True
     
     try:
-        # Try to initialize Pinecone
-        initialize_pinecone()
+        # Try to initialize Pinecone (the client is created once per process)
+        get_pinecone_client()
     except Exception as e:
         pinecone_configured = False
         st.error(f"Error connecting to Pinecone: {str(e)}")
         st.info("Please make sure PINECONE_API_KEY and PINECONE_ENVIRONMENT are set in your environment variables or .env file.")
         return
     
-    # Check if documents have been ingested
-    # First, try to check if the index exists and has documents
-    index_exists = False
+    # Check if documents have been ingested (cached index stats, no embedding call)
     try:
-        # Try to query the index with a simple test query to see if it exists and has documents
-        test_results = find_similar_chunks("test query", index_name, 1)
-        index_exists = len(test_results) > 0
+        index_exists = index_has_documents(index_name)
     except Exception as e:
-        # If there's an error, the index might not exist or be empty
-        index_exists = False
+        st.error(f"Error reading the Pinecone index: {str(e)}")
+        return
         
     # Update session state based on the check
     if index_exists:
@@ -104,24 +191,52 @@ def show_rag_qa_page():
     elif "pinecone_index_initialized" not in st.session_state:
         st.session_state.pinecone_index_initialized = False
         
+    # Collect a finished background ingestion; on success fall through to the
+    # question UI in this same run instead of rerunning the whole page
+    ingest_future = st.session_state.get("ingest_future")
+    if ingest_future is not None and ingest_future.done():
+        del st.session_state.ingest_future
+        try:
+            num_chunks = ingest_future.result()
+            
+            st.success(f"Successfully processed documents and created {num_chunks} chunks!")
+            st.session_state.pinecone_index_initialized = True
+            index_has_documents.clear()
+            # Drop retrievals cached against the index before it had documents
+            find_similar_chunks_cached.clear()
+        except Exception as e:
+            st.error(f"Error ingesting documents: {str(e)}")
+        ingest_future = None
+        
     # If the index is not initialized, show the warning and ingest button
     if not st.session_state.get("pinecone_index_initialized", False):
         st.warning("The knowledge base has not been created yet. Please ingest documents first.")
         
-        if st.button("Ingest Documents"):
-            with st.spinner("Processing documents... This may take a few minutes."):
-                try:
-                    # Get the data directory path
-                    data_dir = Path(os.path.dirname(os.path.dirname(__file__))) / "rag" / "data"
-                    
-                    # Ingest documents
-                    num_chunks = ingest_documents(str(data_dir))
-                    
-                    st.success(f"Successfully processed documents and created {num_chunks} chunks!")
-                    st.session_state.pinecone_index_initialized = True
-                    st.experimental_rerun()
-                except Exception as e:
-                    st.error(f"Error ingesting documents: {str(e)}")
+        if ingest_future is None:
+            if st.button("Ingest Documents"):
+                # Get the data directory path
+                data_dir = Path(os.path.dirname(os.path.dirname(__file__))) / "rag" / "data"
+                
+                # Ingest documents in a background thread; the callback only touches
+                # this plain dict because session state is not available off the script thread
+                progress = {"done": 0, "total": 0}
+                st.session_state.ingest_progress = progress
+                st.session_state.ingest_future = get_ingest_executor().submit(
+                    ingest_documents,
+                    str(data_dir),
+                    progress_callback=lambda done, total: progress.update(done=done, total=total)
+                )
+                st.rerun()
+        else:
+            # Show progress and poll until the background ingestion finishes
+            progress = st.session_state.ingest_progress
+            done, total = progress["done"], progress["total"]
+            if total:
+                st.progress(done / total, text=f"Embedded {done} of {total} chunks...")
+            else:
+                st.progress(0.0, text="Processing documents... This may take a few minutes.")
+            time.sleep(INGEST_POLL_SECONDS)
+            st.rerun()
         
         # Show information about the ingestion process
         with st.expander("About Document Ingestion"):
@@ -142,7 +257,7 @@ def show_rag_qa_page():
     
     # History management
     if "rag_history" not in st.session_state:
-        st.session_state.rag_history = []
+        st.session_state.rag_history = deque(maxlen=RAG_HISTORY_SIZE)
     
     with main_container:
         # Create a container with a light background and rounded corners
@@ -161,28 +276,42 @@ def show_rag_qa_page():
             with col1:
                 # Process question when submitted
                 submit_button = st.button("Get Answer", type="secondary", use_container_width=True)
+            with col2:
+                refresh_answer = st.checkbox("Fetch a fresh answer",
+                                             help="Search the documents again even if this question was answered recently")
+        
+        # Reuse the stored answer for a recently asked question unless a fresh one is requested
+        cached_answer = None
+        if submit_button and question and not refresh_answer:
+            cached_answer = next((a for q, a in st.session_state.rag_history if q == question), None)
+        
+        if cached_answer is not None:
+            with st.container():
+                st.markdown("### Answer")
+                st.markdown(cached_answer)
         
         # Process the question when submitted
-        if submit_button and question:
+        elif submit_button and question:
             with st.spinner("Searching for information..."):
                 try:
-                    # Find relevant chunks using Pinecone with question improvement
-                    relevant_chunks, question_info = find_similar_chunks(question, index_name)
+                    # Find relevant chunks using Pinecone with question improvement; a fresh
+                    # answer bypasses the retrieval cache so the documents are searched again
+                    retrieve = find_similar_chunks if refresh_answer else find_similar_chunks_cached
+                    relevant_chunks, question_info = retrieve(normalize_question(question), index_name)
                     
                     # Generate response
-                    response_data = generate_response(question, relevant_chunks, question_info)
+                    response_data = generate_response(question, relevant_chunks, question_info, stream=True)
                     
                     # Question processing information is now logged to the command line instead of displayed in the UI
                     
                     # Create a container for the answer with a light background
                     with st.container():
                         st.markdown("### Answer")
-                        st.markdown(response_data["answer"])
+                        # Render the answer as it is generated
+                        answer = st.write_stream(response_data["answer"])
                     
-                    # Add to history (keep last 10 questions)
-                    st.session_state.rag_history.insert(0, (question, response_data["answer"]))
-                    if len(st.session_state.rag_history) > 10:
-                        st.session_state.rag_history.pop()
+                    # Add to history; the deque drops the oldest entry past RAG_HISTORY_SIZE
+                    st.session_state.rag_history.appendleft((question, answer))
                 
                 except Exception as e:
                     st.error(f"Error processing question: {str(e)}")
@@ -190,31 +319,8 @@ def show_rag_qa_page():
         with st.expander("About this Q&A System"):
             st.markdown("""This Q&A system uses Retrieval-Augmented Generation (RAG) with Pinecone vector database to answer your questions about diabetes and nutrition. All information comes from verified medical sources in our database.""")
 
-            st.markdown("<h5 style='color:#20a7db; margin-top:0; border-bottom:2px solid #D3D3D3; padding-bottom:10px;'>Example Questions</h5>", unsafe_allow_html=True)
-                               
-            st.markdown("""
-            - What is insulin?
-            - What is insulin resistance?
-            - What are normal blood glucose levels?
-            - How does sleep affect glucose levels?
-            - What is the root cause of Type 2 diabetes?
-            - How does fiber affect blood glucose levels?
-            - How does insulin affect blood glucose levels?
-            - How does exercise affect blood glucose levels?
-            - What's the best breakfast for stable glucose levels?
-            - What is glucose and why is it important for the body?
-            - How do glucose spikes affect energy levels and mood?
-            - What's the relationship between glucose and heart health?
-            - What's the connection between glucose and inflammation?
-            - What's the relationship between carbohydrates and glucose?
-            - What's the connection between glucose levels and diabetes?
-            - What is the link between glucose spikes and inflammatory conditions?
-            - How might I modify my breakfast to reduce morning glucose spikes?
-            - What are the best strategies to prevent glucose spikes after meals?
-            - What are the main differences between Type 1 and Type 2 diabetes?
-            - What's the difference between glucose, fructose, and sucrose?
-            - How does eating food in the right order help with glucose management?
-                    """)   
+            st.markdown(EXAMPLE_QUESTIONS_HEADER_HTML, unsafe_allow_html=True)
+            st.markdown(EXAMPLE_QUESTIONS_HTML, unsafe_allow_html=True)
     
     # Admin section for reingesting documents
     # with st.expander("Admin Options"):
@@ -12,7 +12,7 @@ import argparse
 from typing import List
 import logging
 
-from pinecone_utils import ingest_documents, delete_index
+from pinecone_utils import DEFAULT_INDEX_NAME, ingest_documents, delete_index
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -28,11 +28,8 @@ def get_pdf_files(directory: str) -> List[str]:
     Returns:
         List of paths to PDF files
     """
-    pdf_files = []
-    for file in os.listdir(directory):
-        if file.lower().endswith('.pdf'):
-            pdf_files.append(os.path.join(directory, file))
-    return pdf_files
+    with os.scandir(directory) as entries:
+        return [entry.path for entry in entries if entry.is_file() and entry.name.lower().endswith('.pdf')]
 
 def main():
     """
@@ -41,8 +38,10 @@ def main():
     # Parse command line arguments
     parser = argparse.ArgumentParser(description="Ingest documents into Pinecone vector database")
     parser.add_argument("--data_dir", type=str, default="./data", help="Directory containing PDF files")
-    parser.add_argument("--index_name", type=str, default="diabetes-nutrition", help="Name of the Pinecone index")
+    parser.add_argument("--index_name", type=str, default=DEFAULT_INDEX_NAME, help="Name of the Pinecone index")
     parser.add_argument("--reset", action="store_true", help="Delete existing index before ingestion")
+    parser.add_argument("--fast_text", action="store_true",
+                        help="Extract plain text instead of markdown (faster, loses table structure)")
     
     args = parser.parse_args()
     
@@ -73,7 +72,7 @@ def main():
     
     # Ingest documents
     try:
-        num_chunks = ingest_documents(pdf_files, args.index_name)
+        num_chunks = ingest_documents(pdf_files, args.index_name, fast_text=args.fast_text)
         logger.info(f"Successfully ingested {num_chunks} document chunks into Pinecone index: {args.index_name}")
     except Exception as e:
         logger.error(f"Error ingesting documents: {str(e)}")
@@ -5,10 +5,14 @@ Handles initialization, indexing, and querying operations for Pinecone vector da
 
 import os
 import pinecone
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from dotenv import load_dotenv
 import uuid
+import hashlib
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
 import pymupdf4llm
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from openai import OpenAI
@@ -17,6 +21,26 @@ from openai import OpenAI
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Load environment variables from the .env file once, rather than on every credential lookup
+load_dotenv()
+
+# Upper bound on worker processes used to parse PDFs in parallel
+MAX_PARSE_WORKERS = 8
+
+# Size of the embedding vectors requested from text-embedding-3-small (native size
+# is 1536); the smaller vectors cut Pinecone storage and upsert/query payloads 3x
+EMBEDDING_DIMENSIONS = 512
+
+# Default Pinecone index; named after the embedding size so that indexes built
+# with the earlier 1536-dimension vectors are never queried with 512-dimension ones
+DEFAULT_INDEX_NAME = "diabetes-nutrition-512d"
+
+# Number of embedding requests kept in flight at once during ingestion
+MAX_EMBED_WORKERS = 4
+
+# Connection pool size for concurrent Pinecone upserts during ingestion
+UPSERT_POOL_THREADS = 8
+
 # Try to import streamlit for secrets, but don't fail if not available
 try:
     import streamlit as st
@@ -24,17 +48,16 @@ try:
 except ImportError:
     STREAMLIT_AVAILABLE = False
 
+@lru_cache(maxsize=1)
 def initialize_pinecone():
     """
     Initialize Pinecone client with API key and environment.
     First tries to get credentials from Streamlit secrets, then falls back to environment variables.
+    The client is created once per process and reused by later calls.
     
     Returns:
         pinecone.Pinecone: Initialized Pinecone client
     """
-    # Load environment variables
-    load_dotenv()
-    
     # Try to get credentials from Streamlit secrets first
     api_key = None
     environment = None
@@ -61,15 +84,17 @@ def initialize_pinecone():
     
     return pinecone.Pinecone(api_key=api_key, environment=environment)
 
-def get_or_create_index(pc, index_name: str, dimension: int = 1536, metric: str = "cosine"):
+def get_or_create_index(pc, index_name: str, dimension: int = EMBEDDING_DIMENSIONS, metric: str = "cosine",
+                        pool_threads: int = 1):
     """
     Get existing index or create a new one if it doesn't exist.
     
     Args:
         pc: Pinecone client
         index_name: Name of the index
-        dimension: Vector dimension (1536 for text-embedding-3-small)
+        dimension: Vector dimension, matching the embeddings that will be stored
         metric: Distance metric for similarity search
+        pool_threads: Size of the index's thread pool for async_req requests
         
     Returns:
         pinecone.Index: Pinecone index
@@ -127,9 +152,17 @@ def get_or_create_index(pc, index_name: str, dimension: int = 1536, metric: str
                 raise
     else:
         logger.info(f"Using existing Pinecone index: {index_name}")
+        
+        # An index built for another embedding size would reject every upsert
+        existing_dimension = pc.describe_index(index_name).dimension
+        if existing_dimension != dimension:
+            raise ValueError(
+                f"Pinecone index '{index_name}' has dimension {existing_dimension} but embeddings have "
+                f"dimension {dimension}; delete the index (e.g. ingest_documents.py --reset) and re-ingest"
+            )
     
     # Connect to index
-    return pc.Index(index_name)
+    return pc.Index(index_name, pool_threads=pool_threads)
 
 def delete_all_vectors(index):
     """
@@ -168,9 +201,6 @@ def get_openai_api_key():
     Returns:
         str: OpenAI API key
     """
-    # Load environment variables from .env file
-    load_dotenv()
-    
     # Try to get API key from Streamlit secrets first
     api_key = None
     
@@ -195,6 +225,19 @@ def get_openai_api_key():
     
     return api_key
 
+@lru_cache(maxsize=1)
+def get_openai_client() -> OpenAI:
+    """
+    Get an OpenAI client shared by all embedding and chat requests in this process.
+    
+    Reusing the client keeps its HTTP connections alive between requests and
+    resolves the API key only once.
+    
+    Returns:
+        OpenAI: OpenAI client
+    """
+    return OpenAI(api_key=get_openai_api_key())
+
 def generate_embedding(text: str, model: str = "text-embedding-3-small") -> List[float]:
     """
     Generate an embedding for a text using OpenAI's embedding model.
@@ -206,76 +249,246 @@ def generate_embedding(text: str, model: str = "text-embedding-3-small") -> List
     Returns:
         List[float]: Embedding vector
     """
-    # Get OpenAI API key
-    api_key = get_openai_api_key()
-    
-    # Initialize OpenAI client
-    client = OpenAI(api_key=api_key)
-    
     # Generate embedding
-    embedding = client.embeddings.create(
+    embedding = get_openai_client().embeddings.create(
         model=model, 
-        input=text
+        input=text,
+        dimensions=EMBEDDING_DIMENSIONS
     ).data[0].embedding
     
     return embedding
 
-def load_and_split_documents(file_paths: List[str]) -> List[Dict[str, Any]]:
+def generate_embeddings(texts: List[str], model: str = "text-embedding-3-small") -> List[List[float]]:
+    """
+    Generate embeddings for several texts with a single API request.
+    
+    Args:
+        texts: Texts to generate embeddings for
+        model: OpenAI embedding model to use
+        
+    Returns:
+        List[List[float]]: Embedding vectors in the same order as texts
+    """
+    # Generate embeddings; sort by index in case the API reorders them
+    response = get_openai_client().embeddings.create(model=model, input=texts, dimensions=EMBEDDING_DIMENSIONS)
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+def embed_chunk_batch(batch: List[Dict[str, Any]]) -> List[List[float]]:
+    """
+    Generate embeddings for a batch of chunks, logging instead of raising on failure.
+    
+    Args:
+        batch: Chunks to embed
+        
+    Returns:
+        List[List[float]]: Embedding vectors in chunk order, or an empty list on error
+    """
+    try:
+        return generate_embeddings([chunk["text"] for chunk in batch])
+    except Exception as e:
+        logger.error(f"Error generating embeddings for chunks {batch[0]['id']} to {batch[-1]['id']}: {str(e)}")
+        return []
+
+@lru_cache(maxsize=512)
+def generate_query_embedding(query: str, model: str = "text-embedding-3-small") -> tuple:
+    """
+    Generate an embedding for a search query, caching repeated queries.
+    
+    Args:
+        query: Query string
+        model: OpenAI embedding model to use
+        
+    Returns:
+        tuple: Embedding vector (immutable, since it is shared between callers)
+    """
+    return tuple(generate_embedding(query, model))
+
+@lru_cache(maxsize=1)
+def get_text_splitter() -> RecursiveCharacterTextSplitter:
+    """
+    Get the text splitter used to chunk documents.
+    
+    Building it loads the tiktoken encoding, so one splitter is reused for
+    every file handled by a process.
+    
+    Returns:
+        RecursiveCharacterTextSplitter: Token-based text splitter
+    """
+    return RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+        model_name="gpt-4o", chunk_size=500, chunk_overlap=125
+    )
+
+def extract_pdf_text(file_path: str, fast_text: bool = False) -> str:
+    """
+    Extract the text of a PDF file.
+    
+    Args:
+        file_path: Path to a PDF file
+        fast_text: Use PyMuPDF's plain text extraction instead of layout-aware markdown
+        
+    Returns:
+        str: Extracted text
+    """
+    if not fast_text:
+        return pymupdf4llm.to_markdown(file_path)
+    
+    # Plain page text is much faster to extract but loses table and heading structure
+    import pymupdf
+    with pymupdf.open(file_path) as doc:
+        return "\n\n".join(page.get_text("text") for page in doc)
+
+def chunk_id(filename: str, text: str) -> str:
+    """
+    Build a stable ID for a chunk from its source file and content.
+    
+    The same chunk gets the same ID on every ingestion, however the splitter
+    numbers it, so re-ingesting overwrites vectors instead of duplicating them.
+    
+    Args:
+        filename: Name of the source file
+        text: Chunk text
+        
+    Returns:
+        str: 20-character hex ID
+    """
+    return hashlib.blake2b(f"{filename}|{text}".encode("utf-8"), digest_size=10).hexdigest()
+
+def parse_pdf_to_chunks(file_path: str, fast_text: bool = False) -> List[Dict[str, Any]]:
+    """
+    Extract text from one PDF file and split it into chunks.
+    
+    Defined at module level so it can run in a worker process.
+    
+    Args:
+        file_path: Path to a PDF file
+        fast_text: Use plain text extraction instead of markdown
+        
+    Returns:
+        List of dictionaries containing chunk text and metadata
+    """
+    chunks = []
+    
+    try:
+        logger.info(f"Processing {file_path}...")
+        
+        # Text splitter for chunking documents (shared across files)
+        text_splitter = get_text_splitter()
+        
+        # Extract text from the PDF file
+        md_text = extract_pdf_text(file_path, fast_text)
+        logger.info(f"  Extracted {len(md_text)} characters of text")
+        
+        # Split the text into smaller chunks
+        texts = text_splitter.create_documents([md_text])
+        logger.info(f"  Split into {len(texts)} chunks")
+        
+        # Extract filename for metadata
+        filename = os.path.basename(file_path)
+        
+        # Process each chunk
+        for i, text in enumerate(texts):
+            chunks.append({
+                "id": chunk_id(filename, text.page_content),
+                "text": text.page_content,
+                "metadata": {
+                    "source": filename,
+                    "chunk_index": i + 1,
+                    "total_chunks": len(texts)
+                }
+            })
+        
+    except Exception as e:
+        logger.error(f"Error processing {file_path}: {str(e)}")
+    
+    return chunks
+
+def load_and_split_documents(file_paths: List[str], fast_text: bool = False) -> List[Dict[str, Any]]:
     """
     Load PDF documents, extract text, and split into chunks.
     
+    PDF parsing is CPU-bound, so multiple files are parsed in parallel
+    worker processes.
+    
     Args:
         file_paths: List of paths to PDF files
+        fast_text: Use plain text extraction instead of markdown
         
     Returns:
         List of dictionaries containing chunk text and metadata
     """
+    if len(file_paths) <= 1:
+        return [chunk for file_path in file_paths for chunk in parse_pdf_to_chunks(file_path, fast_text)]
+    
     chunks = []
+    max_workers = min(MAX_PARSE_WORKERS, os.cpu_count() or 1, len(file_paths))
     
-    # Text splitter for chunking documents
-    text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-        model_name="gpt-4o", chunk_size=500, chunk_overlap=125
-    )
-    
-    for file_path in file_paths:
-        try:
-            logger.info(f"Processing {file_path}...")
-            
-            # Extract text from the PDF file
-            md_text = pymupdf4llm.to_markdown(file_path)
-            logger.info(f"  Extracted {len(md_text)} characters of text")
-            
-            # Split the text into smaller chunks
-            texts = text_splitter.create_documents([md_text])
-            logger.info(f"  Split into {len(texts)} chunks")
-            
-            # Extract filename for metadata
-            filename = os.path.basename(file_path)
-            
-            # Process each chunk
-            for i, text in enumerate(texts):
-                chunks.append({
-                    "id": f"{filename}-{i+1}",
-                    "text": text.page_content,
-                    "metadata": {
-                        "source": filename,
-                        "chunk_index": i + 1,
-                        "total_chunks": len(texts)
-                    }
-                })
-            
-        except Exception as e:
-            logger.error(f"Error processing {file_path}: {str(e)}")
+    # Spawn fresh workers rather than forking the (possibly threaded) caller
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        for file_chunks in executor.map(partial(parse_pdf_to_chunks, fast_text=fast_text), file_paths, chunksize=1):
+            chunks.extend(file_chunks)
     
     return chunks
 
-def ingest_documents(file_paths: List[str], index_name: str = "diabetes-nutrition") -> int:
+def deduplicate_chunks(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Drop chunks whose text already appeared in an earlier chunk.
+    
+    Repeated boilerplate (headers, footers, disclaimers) would otherwise be
+    embedded, stored and retrieved once per copy.
+    
+    Args:
+        chunks: Chunks in document order
+        
+    Returns:
+        The first chunk for each distinct text, in the original order
+    """
+    seen_texts = set()
+    unique_chunks = []
+    for chunk in chunks:
+        text = chunk["text"].strip()
+        if text not in seen_texts:
+            seen_texts.add(text)
+            unique_chunks.append(chunk)
+    return unique_chunks
+
+def build_chunk_vectors(batch: List[Dict[str, Any]], embeddings: List[List[float]]) -> List[Dict[str, Any]]:
+    """
+    Build the Pinecone vectors for one batch of embedded chunks.
+    
+    Args:
+        batch: Chunks in the batch
+        embeddings: Embedding vectors for the chunks, empty if embedding failed
+        
+    Returns:
+        List of vectors ready to upsert
+    """
+    # Prepare vectors for Pinecone
+    vectors = []
+    for chunk, embedding in zip(batch, embeddings):
+        # Format metadata
+        metadata = format_metadata(chunk["metadata"])
+        metadata["text"] = chunk["text"]  # Store the text in metadata for retrieval
+        
+        vectors.append({
+            "id": chunk["id"],
+            "values": embedding,
+            "metadata": metadata
+        })
+    
+    return vectors
+
+def ingest_documents(file_paths: List[str], index_name: str = DEFAULT_INDEX_NAME,
+                     progress_callback: Optional[Callable[[int, int], None]] = None,
+                     fast_text: bool = False) -> int:
     """
     Ingest documents into Pinecone.
     
     Args:
         file_paths: List of paths to PDF files
         index_name: Name of the Pinecone index
+        progress_callback: Optional function called with (chunks_done, total_chunks)
+            after each batch is processed
+        fast_text: Use plain text extraction instead of markdown for the PDFs
         
     Returns:
         Number of chunks ingested
@@ -283,59 +496,55 @@ def ingest_documents(file_paths: List[str], index_name: str = "diabetes-nutritio
     # Initialize Pinecone
     pc = initialize_pinecone()
     
-    # Get or create index
-    index = get_or_create_index(pc, index_name)
+    # Get or create index, with a thread pool so upserts can run concurrently
+    index = get_or_create_index(pc, index_name, pool_threads=UPSERT_POOL_THREADS)
     
     # Load and split documents
-    chunks = load_and_split_documents(file_paths)
+    chunks = load_and_split_documents(file_paths, fast_text)
     
     if not chunks:
         logger.warning("No chunks to ingest")
         return 0
     
+    # Embed and store each distinct text only once
+    unique_chunks = deduplicate_chunks(chunks)
+    if len(unique_chunks) < len(chunks):
+        logger.info(f"Skipping {len(chunks) - len(unique_chunks)} duplicate chunks")
+    chunks = unique_chunks
+    
     # Process chunks in batches (Pinecone has a limit on batch size)
     batch_size = 100
+    batches = [chunks[i:i+batch_size] for i in range(0, len(chunks), batch_size)]
     total_chunks_added = 0
+    chunks_done = 0
+    pending_upserts = []
+    
+    # Embedding requests are network-bound, so several batches are requested
+    # concurrently; map() still yields the results in batch order
+    with ThreadPoolExecutor(max_workers=min(MAX_EMBED_WORKERS, len(batches))) as executor:
+        for batch, embeddings in zip(batches, executor.map(embed_chunk_batch, batches)):
+            # Start the upsert without waiting, so it overlaps the remaining embedding requests
+            vectors = build_chunk_vectors(batch, embeddings)
+            if vectors:
+                pending_upserts.append((len(vectors), index.upsert(vectors=vectors, async_req=True)))
+            
+            chunks_done += len(batch)
+            if progress_callback:
+                progress_callback(chunks_done, len(chunks))
     
-    for i in range(0, len(chunks), batch_size):
-        batch = chunks[i:i+batch_size]
-        
-        # Prepare vectors for Pinecone
-        vectors = []
-        for chunk in batch:
-            try:
-                # Generate embedding
-                embedding = generate_embedding(chunk["text"])
-                
-                # Format metadata
-                metadata = format_metadata(chunk["metadata"])
-                metadata["text"] = chunk["text"]  # Store the text in metadata for retrieval
-                
-                # Create vector
-                vector = {
-                    "id": chunk["id"],
-                    "values": embedding,
-                    "metadata": metadata
-                }
-                
-                vectors.append(vector)
-                
-            except Exception as e:
-                logger.error(f"Error generating embedding for chunk {chunk['id']}: {str(e)}")
-        
-        # Upsert vectors to Pinecone
-        if vectors:
-            try:
-                index.upsert(vectors=vectors)
-                logger.info(f"Added {len(vectors)} vectors to Pinecone")
-                total_chunks_added += len(vectors)
-            except Exception as e:
-                logger.error(f"Error upserting vectors to Pinecone: {str(e)}")
+    # Wait for the upserts to finish
+    for num_vectors, result in pending_upserts:
+        try:
+            result.get()
+            logger.info(f"Added {num_vectors} vectors to Pinecone")
+            total_chunks_added += num_vectors
+        except Exception as e:
+            logger.error(f"Error upserting vectors to Pinecone: {str(e)}")
     
     logger.info(f"Successfully added {total_chunks_added} chunks to Pinecone index '{index_name}'")
     return total_chunks_added
 
-def similarity_search(query: str, index_name: str = "diabetes-nutrition", top_k: int = 5) -> List[Dict[str, Any]]:
+def similarity_search(query: str, index_name: str = DEFAULT_INDEX_NAME, top_k: int = 5) -> List[Dict[str, Any]]:
     """
     Perform similarity search on Pinecone index.
     
@@ -353,8 +562,8 @@ def similarity_search(query: str, index_name: str = "diabetes-nutrition", top_k:
     # Get index
     index = pc.Index(index_name)
     
-    # Generate embedding for query
-    query_embedding = generate_embedding(query)
+    # Generate embedding for query (repeated queries reuse the cached vector)
+    query_embedding = list(generate_query_embedding(query))
     
     # Query Pinecone
     results = index.query(
@@ -363,26 +572,19 @@ def similarity_search(query: str, index_name: str = "diabetes-nutrition", top_k:
         include_metadata=True
     )
     
-    # Format results
-    formatted_results = []
-    for match in results["matches"]:
-        # Extract text and metadata
-        metadata = match["metadata"]
-        text = metadata.pop("text", "")  # Remove text from metadata and store separately
-        
-        # Calculate similarity score (convert distance to similarity)
-        similarity = 1.0 - match["score"]  # Assuming cosine distance
-        
-        formatted_results.append({
+    # Format results; the text is moved out of the metadata and stored separately.
+    # With the cosine metric Pinecone's score is already the similarity (higher is closer)
+    return [
+        {
             "id": match["id"],
-            "text": text,
-            "metadata": metadata,
-            "score": similarity
-        })
-    
-    return formatted_results
+            "text": match["metadata"].pop("text", ""),
+            "metadata": match["metadata"],
+            "score": match["score"]
+        }
+        for match in results["matches"]
+    ]
 
-def delete_index(index_name: str = "diabetes-nutrition") -> bool:
+def delete_index(index_name: str = DEFAULT_INDEX_NAME) -> bool:
     """
     Delete a Pinecone index.
     
@@ -3,69 +3,106 @@ Data processing module for the Diabetes Nutrition Plan application.
 Contains functions for preprocessing and validating user input data.
 """
 
-def preprocess_health_data(health_data):
+import re
+
+# Health fields converted to floats during preprocessing
+BODY_METRIC_FIELDS = ('age', 'weight', 'height')
+GLUCOSE_FIELDS = ('fasting_glucose', 'postmeal_glucose', 'hba1c')
+
+# Words (lowercase) that classify education and literacy levels into plan complexity
+SIMPLE_EDUCATION = frozenset({'elementary', 'primary'})
+SIMPLE_LITERACY = frozenset({'low', 'basic'})
+MODERATE_EDUCATION = frozenset({'high', 'secondary'})  # "High School/Secondary"
+MODERATE_LITERACY = frozenset({'moderate', 'average'})
+ADVANCED_EDUCATION = frozenset({'college', 'university', 'bachelor', 'master', 'doctorate'})
+ADVANCED_LITERACY = frozenset({'high'})
+LIMITED_TECHNOLOGY = frozenset({'limited'})
+
+WORD_RE = re.compile(r'[a-z]+')
+
+# Runs of commas, possibly separated by whitespace, left after joining lines
+COMMA_RUN_RE = re.compile(r',(\s*,)+')
+
+def level_words(value):
+    """
+    Split a level such as "High School/Secondary" into its lowercase words.
+    
+    Args:
+        value (str): Level selected by the user, possibly empty
+        
+    Returns:
+        frozenset: Lowercase words in the level
+    """
+    return frozenset(WORD_RE.findall(value.lower())) if value else frozenset()
+
+def preprocess_health_data(health_data, inplace=False):
     """
     Preprocess and validate health data.
     
     Args:
         health_data (dict): Dictionary containing user health information
+        inplace (bool): Update health_data itself instead of a copy
         
     Returns:
         dict: Processed health data with calculated metrics
     """
-    processed_data = health_data.copy()
+    processed_data = health_data if inplace else health_data.copy()
     
     # Convert values to appropriate types
-    for key in ['age', 'weight', 'height']:
-        if key in processed_data and processed_data[key]:
-            processed_data[key] = float(processed_data[key])
+    for key in BODY_METRIC_FIELDS:
+        value = processed_data.get(key)
+        if value:
+            processed_data[key] = float(value)
     
     # Calculate BMI if height and weight are available
-    if all(key in processed_data and processed_data[key] for key in ['weight', 'height']):
-        height_m = processed_data['height'] / 100  # Convert cm to m
-        processed_data['bmi'] = round(processed_data['weight'] / (height_m ** 2), 1)
+    weight, height = processed_data.get('weight'), processed_data.get('height')
+    if weight and height:
+        height_m = height / 100  # Convert cm to m
+        processed_data['bmi'] = round(weight / (height_m ** 2), 1)
     
     # Convert glucose values to float
-    for key in ['fasting_glucose', 'postmeal_glucose', 'hba1c']:
-        if key in processed_data and processed_data[key]:
-            processed_data[key] = float(processed_data[key])
+    for key in GLUCOSE_FIELDS:
+        value = processed_data.get(key)
+        if value:
+            processed_data[key] = float(value)
     
     return processed_data
 
-def preprocess_socioeconomic_data(socio_data):
+def preprocess_socioeconomic_data(socio_data, inplace=False):
     """
     Preprocess and validate socioeconomic data.
     
     Args:
         socio_data (dict): Dictionary containing user socioeconomic information
+        inplace (bool): Update socio_data itself instead of a copy
         
     Returns:
         dict: Processed socioeconomic data with derived attributes
     """
-    processed_data = socio_data.copy()
+    processed_data = socio_data if inplace else socio_data.copy()
+    
+    # Split each level into words once; the rules below are set intersections
+    edu = level_words(processed_data.get('education_level'))
+    lit = level_words(processed_data.get('literacy_level'))
     
     # Determine plan complexity level based on education and literacy
     if 'education_level' in processed_data and 'literacy_level' in processed_data:
-        edu = processed_data['education_level'].lower() if processed_data['education_level'] else ''
-        lit = processed_data['literacy_level'].lower() if processed_data['literacy_level'] else ''
-        
-        if ('elementary' in edu or 'primary' in edu or 'low' in lit or 'basic' in lit):
+        if edu & SIMPLE_EDUCATION or lit & SIMPLE_LITERACY:
             processed_data['plan_complexity'] = 'simple'
-        elif ('high school' in edu or 'secondary' in edu or 'moderate' in lit or 'average' in lit):
+        elif edu & MODERATE_EDUCATION or lit & MODERATE_LITERACY:
             processed_data['plan_complexity'] = 'moderate'
-        elif ('college' in edu or 'university' in edu or 'bachelor' in edu or 'master' in edu or 'doctorate' in edu or 'high' in lit):
+        elif edu & ADVANCED_EDUCATION or lit & ADVANCED_LITERACY:
             processed_data['plan_complexity'] = 'advanced'
         else:
             processed_data['plan_complexity'] = 'moderate'  # Default to moderate
     
     # Format guidance based on literacy and technology access
     if 'literacy_level' in processed_data and 'technology_access' in processed_data:
-        lit = processed_data['literacy_level'].lower() if processed_data['literacy_level'] else ''
-        tech = processed_data['technology_access'].lower() if processed_data['technology_access'] else ''
+        tech = level_words(processed_data['technology_access'])
         
-        if 'low' in lit or 'basic' in lit:
+        if lit & SIMPLE_LITERACY:
             processed_data['format_guidance'] = 'highly visual with minimal text'
-        elif 'limited' in tech:
+        elif tech & LIMITED_TECHNOLOGY:
             processed_data['format_guidance'] = 'printable with visual aids'
         else:
             processed_data['format_guidance'] = 'balanced text and visuals'
@@ -83,12 +120,11 @@ def combine_user_data(health_data, socio_data):
     Returns:
         dict: Combined user data
     """
-    # Process both data sets
-    processed_health_data = preprocess_health_data(health_data)
-    processed_socio_data = preprocess_socioeconomic_data(socio_data)
-    
-    # Combine the data
-    combined_data = {**processed_health_data, **processed_socio_data}
+    # Combine the data into one new dict, then process both data sets in place
+    # (the two forms have no fields in common)
+    combined_data = {**health_data, **socio_data}
+    preprocess_health_data(combined_data, inplace=True)
+    preprocess_socioeconomic_data(combined_data, inplace=True)
     
     return combined_data
 
@@ -106,8 +142,8 @@ def format_display_text(text, max_length=50):
     if not text:
         return "None"
         
-    # Replace newlines with commas for display
-    formatted_text = text.replace('\n', ', ').replace(',,', ',').strip(',')
+    # Replace newlines with commas for display, collapsing repeated commas in one pass
+    formatted_text = COMMA_RUN_RE.sub(',', text.replace('\n', ', ')).strip(', ')
     
     # Truncate if too long
     if len(formatted_text) > max_length:
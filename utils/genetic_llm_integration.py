@@ -3,13 +3,24 @@ Genetic LLM integration module for the Diabetes Nutrition Plan application.
 Contains functions for integrating genetic data into the nutrition plan.
 """
 
-from openai import OpenAI
 import json
 import streamlit as st
 from typing import Dict, List, Optional, Any
 
+from utils.llm_integration import initialize_openai_client
+
 GPT_MODEL = "gpt-4.1-2025-04-14"
 
+# Genetic factors listed in the nutrition plan prompt, as
+# (profile key, section title, field label, field key)
+GENETIC_PROMPT_FACTORS = (
+    ("carb_metabolism", "Carbohydrate Metabolism", "Carbohydrate Sensitivity", "carb_sensitivity"),
+    ("fat_metabolism", "Fat Metabolism", "Saturated Fat Sensitivity", "saturated_fat_sensitivity"),
+    ("vitamin_metabolism", "Vitamin Metabolism", "Folate Processing", "folate_processing"),
+    ("inflammation_response", "Inflammation Response", "Inflammatory Response", "inflammatory_response"),
+    ("caffeine_metabolism", "Caffeine Metabolism", "Caffeine Processing", "caffeine_metabolism"),
+)
+
 def format_structured_genetic_nutrition_plan(structured_data):
     """
     Convert the structured genetic nutrition plan data into four separate sections:
@@ -532,7 +543,7 @@ def generate_genetic_enhanced_nutrition_plan(user_data, genetic_profile, api_key
     """
     prompt = create_genetic_nutrition_plan_prompt(user_data, genetic_profile)
     
-    client = OpenAI(api_key=api_key)
+    client = initialize_openai_client(api_key)
     response = client.chat.completions.create(
         model=GPT_MODEL,
         messages=[
@@ -619,75 +630,31 @@ def create_genetic_nutrition_plan_prompt(user_data: Dict, genetic_profile: Dict)
     - Time for Meal Preparation: {user_data.get('meal_prep_time')}
     """
     
-    # Format genetic insights
-    genetic_info = """
+    # Format genetic insights; the parts are collected in a list and joined once
+    genetic_parts = ["""
     ## Genetic Insights
-    """
-    
-    # Add carbohydrate metabolism insights
-    carb_metabolism = genetic_profile.get("carb_metabolism", {})
-    genetic_info += f"""
-    ### Carbohydrate Metabolism
-    - Carbohydrate Sensitivity: {carb_metabolism.get('carb_sensitivity', 'normal')}
-    - Explanation: {carb_metabolism.get('explanation', '')}
+    """]
+    
+    # Add the insights for each genetic factor
+    for factor_key, title, label, field in GENETIC_PROMPT_FACTORS:
+        factor = genetic_profile.get(factor_key) or {}
+        genetic_parts.append(f"""
+    ### {title}
+    - {label}: {factor.get(field, 'normal')}
+    - Explanation: {factor.get('explanation', '')}
     - Key Recommendations:
-    """
-    for rec in carb_metabolism.get('recommendations', []):
-        genetic_info += f"  - {rec}\n"
-    
-    # Add fat metabolism insights
-    fat_metabolism = genetic_profile.get("fat_metabolism", {})
-    genetic_info += f"""
-    ### Fat Metabolism
-    - Saturated Fat Sensitivity: {fat_metabolism.get('saturated_fat_sensitivity', 'normal')}
-    - Explanation: {fat_metabolism.get('explanation', '')}
-    - Key Recommendations:
-    """
-    for rec in fat_metabolism.get('recommendations', []):
-        genetic_info += f"  - {rec}\n"
-    
-    # Add vitamin metabolism insights
-    vitamin_metabolism = genetic_profile.get("vitamin_metabolism", {})
-    genetic_info += f"""
-    ### Vitamin Metabolism
-    - Folate Processing: {vitamin_metabolism.get('folate_processing', 'normal')}
-    - Explanation: {vitamin_metabolism.get('explanation', '')}
-    - Key Recommendations:
-    """
-    for rec in vitamin_metabolism.get('recommendations', []):
-        genetic_info += f"  - {rec}\n"
-    
-    # Add inflammation response insights
-    inflammation_response = genetic_profile.get("inflammation_response", {})
-    genetic_info += f"""
-    ### Inflammation Response
-    - Inflammatory Response: {inflammation_response.get('inflammatory_response', 'normal')}
-    - Explanation: {inflammation_response.get('explanation', '')}
-    - Key Recommendations:
-    """
-    for rec in inflammation_response.get('recommendations', []):
-        genetic_info += f"  - {rec}\n"
-    
-    # Add caffeine metabolism insights
-    caffeine_metabolism = genetic_profile.get("caffeine_metabolism", {})
-    genetic_info += f"""
-    ### Caffeine Metabolism
-    - Caffeine Processing: {caffeine_metabolism.get('caffeine_metabolism', 'normal')}
-    - Explanation: {caffeine_metabolism.get('explanation', '')}
-    - Key Recommendations:
-    """
-    for rec in caffeine_metabolism.get('recommendations', []):
-        genetic_info += f"  - {rec}\n"
+    """)
+        genetic_parts.extend(f"  - {rec}\n" for rec in factor.get('recommendations', []))
     
     # Add overall genetic summary
-    genetic_info += f"""
+    genetic_parts.append(f"""
     ### Overall Genetic Summary
     {genetic_profile.get('overall_summary', '')}
     
     Key Genetic-Based Recommendations:
-    """
-    for rec in genetic_profile.get('key_recommendations', []):
-        genetic_info += f"- {rec}\n"
+    """)
+    genetic_parts.extend(f"- {rec}\n" for rec in genetic_profile.get('key_recommendations', []))
+    genetic_info = "".join(genetic_parts)
     
     # Build the complete prompt
     prompt = f"""
@@ -830,7 +797,7 @@ def generate_genetic_health_assessment(user_data, genetic_profile, api_key):
     # Create a comprehensive prompt that includes both health and genetic data
     prompt = create_genetic_health_assessment_prompt(user_data, genetic_profile)
     
-    client = OpenAI(api_key=api_key)
+    client = initialize_openai_client(api_key)
     
     # Get the genetic tools schema
     tools = create_genetic_health_assessment_tools()
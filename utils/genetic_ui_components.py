@@ -4,8 +4,6 @@ Contains UI components for genetic data input and visualization.
 """
 
 import streamlit as st
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
 import numpy as np
 import base64
 import io
@@ -542,6 +540,9 @@ def create_carb_sensitivity_visualization(sensitivity_level):
     Returns:
         matplotlib.figure.Figure: A figure showing carbohydrate sensitivity
     """
+    import matplotlib.pyplot as plt
+    import matplotlib.patches as patches
+    
     # Create figure
     fig, ax = plt.subplots(figsize=(6, 4), facecolor='#f8f9fa')
     ax.set_facecolor('#f8f9fa')
@@ -609,6 +610,8 @@ def create_fat_sensitivity_visualization(sensitivity_level):
     Returns:
         matplotlib.figure.Figure: A figure showing fat sensitivity
     """
+    import matplotlib.pyplot as plt
+    
     # Create figure
     fig, ax = plt.subplots(figsize=(6, 4), facecolor='#f8f9fa')
     ax.set_facecolor('#f8f9fa')
@@ -662,6 +665,8 @@ def create_caffeine_metabolism_visualization(metabolism_rate):
     Returns:
         matplotlib.figure.Figure: A figure showing caffeine metabolism
     """
+    import matplotlib.pyplot as plt
+    
     # Create figure
     fig, ax = plt.subplots(figsize=(6, 4), facecolor='#f8f9fa')
     ax.set_facecolor('#f8f9fa')
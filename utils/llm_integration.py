@@ -1,12 +1,19 @@
 from openai import OpenAI
 import json
 import streamlit as st
+from functools import lru_cache
 
 GPT_MODEL = "gpt-4.1-2025-04-14"  # Specify the model to use
 
 # This module handles all OpenAI API interactions for the diabetes nutrition plan application
+@lru_cache(maxsize=4)
 def initialize_openai_client(api_key):
-    """Initialize and return an OpenAI client with the provided API key."""
+    """
+    Initialize and return an OpenAI client with the provided API key.
+    
+    Clients are cached per key, so repeated calls reuse the same HTTP
+    connection pool instead of opening a new TLS connection each time.
+    """
     return OpenAI(api_key=api_key)
 
 def create_health_assessment_tools():
@@ -84,7 +91,7 @@ def generate_health_assessment(user_data, api_key):
     """Generate a health assessment using OpenAI API based on user health data."""
     prompt = create_health_assessment_prompt(user_data)
     
-    client = OpenAI(api_key=api_key)
+    client = initialize_openai_client(api_key)
     
     # Get the tools schema
     tools = create_health_assessment_tools()
@@ -384,7 +391,7 @@ def generate_nutrition_plan(user_data, api_key):
     """
     prompt = create_nutrition_plan_prompt(user_data)
     
-    client = OpenAI(api_key=api_key)
+    client = initialize_openai_client(api_key)
     
     # Get the tools schema
     tools = create_nutrition_plan_tools()
@@ -708,7 +715,7 @@ def generate_visual_guidance(nutrition_plan, literacy_level, plan_complexity, ap
     3. The key message this visual is meant to convey
     """
     
-    client = OpenAI(api_key=api_key)
+    client = initialize_openai_client(api_key)
     response = client.chat.completions.create(
         model=GPT_MODEL,
         messages=[
@@ -5,39 +5,19 @@ and generating responses to user questions using Pinecone for vector storage and
 """
 
 import os
-import pathlib
 import logging
-from typing import List, Dict, Any, Tuple, Optional, Union
+from typing import List, Dict, Any, Tuple, Optional, Union, Callable
 
 import streamlit as st
-from openai import OpenAI
 
-from rag.pinecone_utils import similarity_search, ingest_documents as pinecone_ingest_documents
+from rag.pinecone_utils import DEFAULT_INDEX_NAME, get_openai_client, similarity_search, ingest_documents as pinecone_ingest_documents
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def get_openai_api_key():
-    """
-    Get the OpenAI API key from environment variables or Streamlit secrets.
-    
-    Returns:
-        str: OpenAI API key
-    """
-    # Try to get API key from Streamlit secrets
-    api_key = st.secrets.get("OPENAI_API_KEY")
-    
-    # If not found in Streamlit secrets, try environment variables
-    if not api_key:
-        api_key = os.environ.get("OPENAI_API_KEY") or os.environ.get("OPENAI_KEY")
-    
-    if not api_key:
-        raise ValueError("OpenAI API key not found in environment variables or Streamlit secrets.")
-    
-    return api_key
-
-def ingest_documents(data_dir: str, index_name: str = "diabetes-nutrition") -> int:
+def ingest_documents(data_dir: str, index_name: str = DEFAULT_INDEX_NAME,
+                     progress_callback: Optional[Callable[[int, int], None]] = None) -> int:
     """
     Process PDF documents in the data directory, extract text, split into chunks,
     generate embeddings, and store in a Pinecone index.
@@ -45,16 +25,18 @@ def ingest_documents(data_dir: str, index_name: str = "diabetes-nutrition") -> i
     Args:
         data_dir: Path to directory containing PDF files
         index_name: Name of the Pinecone index to store documents
+        progress_callback: Optional function called with (chunks_done, total_chunks)
+            after each batch is stored
         
     Returns:
         int: Number of chunks added to the index
     """
     # Get list of PDF files in the data directory
-    data_path = pathlib.Path(data_dir)
-    file_paths = [str(data_path / f) for f in os.listdir(data_path) if f.endswith('.pdf')]
+    with os.scandir(data_dir) as entries:
+        file_paths = [entry.path for entry in entries if entry.is_file() and entry.name.endswith('.pdf')]
     
     # Ingest documents using Pinecone
-    return pinecone_ingest_documents(file_paths, index_name)
+    return pinecone_ingest_documents(file_paths, index_name, progress_callback)
 
 def improve_question(question: str, model: str = "gpt-4o") -> Dict[str, str]:
     """
@@ -68,8 +50,8 @@ def improve_question(question: str, model: str = "gpt-4o") -> Dict[str, str]:
     Returns:
         Dictionary containing the improved question and explanation
     """
-    # Initialize OpenAI client
-    client = OpenAI(api_key=get_openai_api_key())
+    # Reuse the OpenAI client shared by this process
+    client = get_openai_client()
     
     # Create prompt for question improvement
     prompt = f"""
@@ -128,7 +110,7 @@ def improve_question(question: str, model: str = "gpt-4o") -> Dict[str, str]:
         "explanation": explanation
     }
 
-def find_similar_chunks(question: str, index_name: str = "diabetes-nutrition", top_k: int = 5, improve: bool = True) -> Tuple[List[Tuple[Dict[str, Any], float]], Dict[str, str]]:
+def find_similar_chunks(question: str, index_name: str = DEFAULT_INDEX_NAME, top_k: int = 5, improve: bool = True) -> Tuple[List[Tuple[Dict[str, Any], float]], Dict[str, str]]:
     """
     Find chunks most similar to the question using Pinecone's similarity search.
     Optionally improves the question using LLM before searching.
@@ -175,8 +157,43 @@ def find_similar_chunks(question: str, index_name: str = "diabetes-nutrition", t
     
     return similar_chunks, question_info
 
+def normalize_question(question: str) -> str:
+    """
+    Collapse runs of whitespace in a question and trim its ends.
+    
+    Callers apply this before find_similar_chunks_cached, whose cache is keyed
+    on the raw argument, so trivially different spellings share an entry.
+    
+    Args:
+        question: User question
+        
+    Returns:
+        str: Normalized question
+    """
+    return " ".join(question.split())
+
+@st.cache_data(ttl=600, max_entries=256, show_spinner=False)
+def find_similar_chunks_cached(question: str, index_name: str = DEFAULT_INDEX_NAME, top_k: int = 5) -> Tuple[List[Tuple[Dict[str, Any], float]], Dict[str, str]]:
+    """
+    Cached version of find_similar_chunks for questions asked again within ten minutes.
+    
+    Repeat questions skip the question improvement call, the embedding call and
+    the Pinecone query. The cache is keyed on the exact arguments, so pass the
+    question through normalize_question first.
+    
+    Args:
+        question: User question, already normalized
+        index_name: Name of the Pinecone index
+        top_k: Number of most similar chunks to return
+        
+    Returns:
+        Same as find_similar_chunks
+    """
+    return find_similar_chunks(question, index_name, top_k)
+
 def generate_response(question: str, relevant_chunks: List[Tuple[Dict[str, Any], float]], 
-                     question_info: Dict[str, str] = None, model: str = "gpt-4o") -> Dict[str, Any]:
+                     question_info: Dict[str, str] = None, model: str = "gpt-4o",
+                     stream: bool = False) -> Dict[str, Any]:
     """
     Generate a response using the question and relevant chunks as context.
     
@@ -185,12 +202,14 @@ def generate_response(question: str, relevant_chunks: List[Tuple[Dict[str, Any],
         relevant_chunks: List of tuples containing relevant chunks and their similarity scores
         question_info: Dictionary containing question improvement information
         model: OpenAI model to use for response generation
+        stream: Whether to stream the answer as it is generated
         
     Returns:
-        Dictionary containing the response and source information
+        Dictionary containing the response and source information. With stream=True
+        the "answer" value is an iterator of text deltas (e.g. for st.write_stream).
     """
-    # Initialize OpenAI client
-    client = OpenAI(api_key=get_openai_api_key())
+    # Reuse the OpenAI client shared by this process
+    client = get_openai_client()
     
     # Create context from relevant chunks
     context_parts = []
@@ -203,11 +222,8 @@ def generate_response(question: str, relevant_chunks: List[Tuple[Dict[str, Any],
             
         context_parts.append(f"[{i+1}] {chunk['text']}")
         
-        # Extract source from metadata if available, otherwise from ID
-        if 'metadata' in chunk and 'source' in chunk['metadata']:
-            source_id = chunk['metadata']['source']
-        else:
-            source_id = chunk['id'].split('-')[0]  # Extract filename from chunk ID
+        # Extract source from metadata (chunk IDs are content hashes, not filenames)
+        source_id = chunk.get('metadata', {}).get('source', 'Unknown source')
             
         if source_id not in sources:
             sources.append(source_id)
@@ -240,9 +256,15 @@ def generate_response(question: str, relevant_chunks: List[Tuple[Dict[str, Any],
             {"role": "system", "content": "You are a helpful assistant that answers questions about diabetes and nutrition based only on the provided context. You provide accurate, evidence-based information and clearly indicate when information is not available in the provided context."},
             {"role": "user", "content": prompt}
         ],
-        temperature=0.3
+        temperature=0.3,
+        stream=stream
     )
     
+    if stream:
+        answer = (chunk.choices[0].delta.content or "" for chunk in response if chunk.choices)
+    else:
+        answer = response.choices[0].message.content
+    
     # Prepare chunks for response
     response_chunks = []
     for chunk, score in relevant_chunks:
@@ -251,11 +273,11 @@ def generate_response(question: str, relevant_chunks: List[Tuple[Dict[str, Any],
                 "text": chunk["text"],
                 "id": chunk["id"],
                 "score": score,
-                "source": chunk.get("metadata", {}).get("source", chunk["id"].split('-')[0])
+                "source": chunk.get("metadata", {}).get("source", "Unknown source")
             })
     
     return {
-        "answer": response.choices[0].message.content,
+        "answer": answer,
         "sources": sources,
         "chunks": response_chunks,
         "question_info": question_info
@@ -1,311 +1,313 @@
 """
 Visualization module for the Diabetes Nutrition Plan application.
 Contains functions for creating charts and visual representations.
+
+The nutrition plan visual guides are returned as PNG bytes and cached with
+st.cache_resource, so callers should pass hashable (tuple/frozenset) arguments
+and render them with st.image. The bytes are immutable, so one cached copy is
+shared by every session instead of being copied out on each read.
 """
 
+import streamlit as st
 import matplotlib.pyplot as plt
 import numpy as np
+from io import BytesIO
 from matplotlib.patches import Rectangle, FancyBboxPatch, Circle, Wedge, Polygon
 import matplotlib.patheffects as path_effects
 
+# How long rendered visual guides stay in the Streamlit cache (seconds)
+VISUAL_CACHE_TTL = 24 * 60 * 60
+
+# Dietary restrictions that switch the guides to plant-based examples
+PLANT_BASED_DIETS = frozenset({"Vegetarian", "Vegan"})
+PLANT_BASED_DIETS_ANY_CASE = PLANT_BASED_DIETS | {"vegetarian", "vegan"}
+
 
-def create_enhanced_portion_guide(cultural_preferences=None, food_preferences=None, dietary_restrictions=None):
+def _figure_to_png(fig):
     """
-    Create a visual portion guide for meal planning.
+    Render a matplotlib figure to PNG bytes and close it.
     
     Args:
-        cultural_preferences (str, optional): Cultural food preferences
-        food_preferences (list, optional): Food preferences
-        dietary_restrictions (list, optional): Dietary restrictions
+        fig (matplotlib.figure.Figure): Figure to render
         
     Returns:
-        matplotlib.figure.Figure: A figure containing the portion guide
+        bytes: PNG image data
     """
-    try:
-        # Create figure with a nice background
-        fig, ax = plt.subplots(figsize=(10, 6), facecolor='#f8f9fa')
-        ax.set_facecolor('#f8f9fa')
-        
-        # Draw the plate
-        plate = Circle((0.5, 0.5), 0.4, fill=True, color='#FFFFFF', ec='#333333', linewidth=2)
-        ax.add_patch(plate)
-        
-        # Create the plate sections
-        # Left half - vegetables
-        veg_wedge = Wedge((0.5, 0.5), 0.4, 90, 270, color='#81c784', alpha=0.7)  # Green for vegetables
-        ax.add_patch(veg_wedge)
-        
-        # Top right - proteins
-        protein_wedge = Wedge((0.5, 0.5), 0.4, 270, 0, color='#ffb74d', alpha=0.7)  # Orange for proteins
-        ax.add_patch(protein_wedge)
-        
-        # Bottom right - carbs
-        carb_wedge = Wedge((0.5, 0.5), 0.4, 0, 90, color='#64b5f6', alpha=0.7)  # Blue for carbs
-        ax.add_patch(carb_wedge)
-        
-        # Add section labels with icons
-        ax.text(0.35, 0.6, "NON-STARCHY\nVEGETABLES\n(50%)", ha='center', va='center', fontweight='bold', color='#1b5e20')
-        ax.text(0.70, 0.75, "PROTEINS\n(25%)", ha='center', va='center', fontweight='bold', color='#e65100')
-        ax.text(0.75, 0.25, "CARBS\n(25%)", ha='center', va='center', fontweight='bold', color='#0d47a1')
-        
-        # Customize food examples based on user preferences and restrictions
-        # Vegetables
-        veg_examples = ["Broccoli", "Spinach", "Peppers", "Tomatoes", "Zucchini"]
-        # Check if user has specified vegetable preferences
-        if food_preferences and "Low vegetable intake" in food_preferences:
-            veg_examples = ["Carrots", "Tomatoes", "Cucumber", "Corn", "Green Beans"]
-        
-        # Proteins
-        protein_examples = ["Chicken", "Fish", "Beans", "Tofu", "Eggs", "Legumes", "Greek Yogurt"]
-        # Customize protein examples based on dietary restrictions
-        if dietary_restrictions:
-            if "Vegetarian" in dietary_restrictions or "Vegan" in dietary_restrictions:
-                protein_examples = ["Tofu", "Beans", "Lentils", "Eggs", "Greek Yogurt", "Legumes", "Whole Grains"]
-        
-        # Carbs
-        carb_examples = ["Brown rice", "Sweet potato", "Quinoa", "Whole grain bread"]
-        # Customize carb examples based on preferences
-        if dietary_restrictions and "gluten-free" in dietary_restrictions:
-            carb_examples = ["Brown rice", "Sweet potato", "Quinoa", "Gluten-free oats"]
-        
-        # Column layout for examples
-        for i, veg in enumerate(veg_examples[:5]):
-            ax.text(0.15, 0.65 - i*0.06, f"• {veg}", fontsize=9, color='#1b5e20')
-        
-        for i, protein in enumerate(protein_examples):
-            ax.text(0.52, 0.85 - i*0.05, f"• {protein}", fontsize=7, color='#e65100')
-        
-        for i, carb in enumerate(carb_examples[:4]):
-            ax.text(0.52, 0.45 - i*0.06, f"• {carb}", fontsize=9, color='#0d47a1')
-        
-        # Add a helpful title with personalization
-        title = "Diabetes-Friendly Portion Guide"
-        if cultural_preferences:
-            title = f"Diabetes-Friendly Portion Guide ({cultural_preferences} Focus)"
-        
-        ax.text(0.5, 0.95, title, ha='center', va='center', 
-                fontsize=16, fontweight='bold', color='#333333')
-        
-        # Add a footnote
-        ax.text(0.5, 0.05, "For optimal blood sugar management, follow this portion guide", 
-                ha='center', va='center', fontsize=10, color='#555555', style='italic')
-        
-        # Set limits and remove axes
-        ax.set_xlim(0, 1)
-        ax.set_ylim(0, 1)
-        ax.axis('off')
-        
-        return fig
-    except Exception as e:
-        print(f"Error creating enhanced portion guide: {e}")
-        return None
+    buf = BytesIO()
+    fig.savefig(buf, format='png', dpi=200, bbox_inches='tight')
+    plt.close(fig)
+    return buf.getvalue()
 
 
-def create_enhanced_glucose_guide():
+def _draw_portion_guide(ax, cultural_preferences=None, food_preferences=None, dietary_restrictions=None):
     """
-    Create a blood glucose target range visualization.
+    Draw the plate-method portion guide onto an axes.
     
-    Returns:
-        matplotlib.figure.Figure: A figure showing glucose target ranges
+    Args:
+        ax (matplotlib.axes.Axes): Axes to draw on
+        cultural_preferences (str, optional): Cultural food preferences
+        food_preferences (tuple, optional): Food preferences
+        dietary_restrictions (frozenset, optional): Dietary restrictions
     """
-    try:
-        from matplotlib.patches import Rectangle, Polygon
-        import numpy as np
-        
-        fig, ax = plt.subplots(figsize=(10, 4), facecolor='#f8f9fa')
-        ax.set_facecolor('#f8f9fa')
-        
-        # Create a more attractive glucose meter visualization
-        # Low range (red)
-        ax.add_patch(Rectangle((0, 0.2), 0.3, 0.6, color='#ffcdd2', alpha=0.7))
-        ax.text(0.15, 0.5, "LOW\n< 70 mg/dL\n\nSymptoms:\nShaking, sweating,\nconfusion, dizziness", 
-                ha='center', va='center', fontsize=10, color='#c62828')
-        
-        # Target range (green)
-        ax.add_patch(Rectangle((0.3, 0.2), 0.4, 0.6, color='#c8e6c9', alpha=0.7))
-        ax.text(0.5, 0.5, "TARGET RANGE\n70-180 mg/dL\n\nGoal:\nStay in this range\nas much as possible", 
-                ha='center', va='center', fontsize=12, fontweight='bold', color='#2e7d32')
-        
-        # High range (red)
-        ax.add_patch(Rectangle((0.7, 0.2), 0.3, 0.6, color='#ffcdd2', alpha=0.7))
-        ax.text(0.85, 0.5, "HIGH\n> 180 mg/dL\n\nSymptoms:\nThirst, fatigue,\nfrequent urination", 
-                ha='center', va='center', fontsize=10, color='#c62828')
-        
-        # Add a meter-like pointer
-        triangle_vertices = np.array([[0.5, 0.2], [0.47, 0.15], [0.53, 0.15]])
-        meter = Polygon(triangle_vertices, color='#333333')
-        ax.add_patch(meter)
-        
-        # Add a title
-        ax.text(0.5, 0.9, "BLOOD GLUCOSE TARGET RANGES", ha='center', va='center', 
-                fontsize=16, fontweight='bold', color='#333333')
-        
-        # Set limits and remove axes
-        ax.set_xlim(0, 1)
-        ax.set_ylim(0, 1)
-        ax.axis('off')
-        
-        return fig
-    except Exception as e:
-        print(f"Error creating enhanced glucose guide: {e}")
-        return None
+    ax.set_facecolor('#f8f9fa')
+    
+    # Draw the plate
+    plate = Circle((0.5, 0.5), 0.4, fill=True, color='#FFFFFF', ec='#333333', linewidth=2)
+    ax.add_patch(plate)
+    
+    # Create the plate sections
+    # Left half - vegetables
+    veg_wedge = Wedge((0.5, 0.5), 0.4, 90, 270, color='#81c784', alpha=0.7)  # Green for vegetables
+    ax.add_patch(veg_wedge)
+    
+    # Top right - proteins
+    protein_wedge = Wedge((0.5, 0.5), 0.4, 270, 0, color='#ffb74d', alpha=0.7)  # Orange for proteins
+    ax.add_patch(protein_wedge)
+    
+    # Bottom right - carbs
+    carb_wedge = Wedge((0.5, 0.5), 0.4, 0, 90, color='#64b5f6', alpha=0.7)  # Blue for carbs
+    ax.add_patch(carb_wedge)
+    
+    # Add section labels with icons
+    ax.text(0.35, 0.6, "NON-STARCHY\nVEGETABLES\n(50%)", ha='center', va='center', fontweight='bold', color='#1b5e20')
+    ax.text(0.70, 0.75, "PROTEINS\n(25%)", ha='center', va='center', fontweight='bold', color='#e65100')
+    ax.text(0.75, 0.25, "CARBS\n(25%)", ha='center', va='center', fontweight='bold', color='#0d47a1')
+    
+    # Customize food examples based on user preferences and restrictions
+    # Vegetables
+    veg_examples = ["Broccoli", "Spinach", "Peppers", "Tomatoes", "Zucchini"]
+    # Check if user has specified vegetable preferences
+    if food_preferences and "Low vegetable intake" in food_preferences:
+        veg_examples = ["Carrots", "Tomatoes", "Cucumber", "Corn", "Green Beans"]
+    
+    # Proteins
+    protein_examples = ["Chicken", "Fish", "Beans", "Tofu", "Eggs", "Legumes", "Greek Yogurt"]
+    # Customize protein examples based on dietary restrictions
+    if PLANT_BASED_DIETS.intersection(dietary_restrictions or ()):
+        protein_examples = ["Tofu", "Beans", "Lentils", "Eggs", "Greek Yogurt", "Legumes", "Whole Grains"]
+    
+    # Carbs
+    carb_examples = ["Brown rice", "Sweet potato", "Quinoa", "Whole grain bread"]
+    # Customize carb examples based on preferences
+    if dietary_restrictions and "gluten-free" in dietary_restrictions:
+        carb_examples = ["Brown rice", "Sweet potato", "Quinoa", "Gluten-free oats"]
+    
+    # Column layout for examples
+    for i, veg in enumerate(veg_examples[:5]):
+        ax.text(0.15, 0.65 - i*0.06, f"• {veg}", fontsize=9, color='#1b5e20')
+    
+    for i, protein in enumerate(protein_examples):
+        ax.text(0.52, 0.85 - i*0.05, f"• {protein}", fontsize=7, color='#e65100')
+    
+    for i, carb in enumerate(carb_examples[:4]):
+        ax.text(0.52, 0.45 - i*0.06, f"• {carb}", fontsize=9, color='#0d47a1')
+    
+    # Add a helpful title with personalization
+    title = "Diabetes-Friendly Portion Guide"
+    if cultural_preferences:
+        title = f"Diabetes-Friendly Portion Guide ({cultural_preferences} Focus)"
+    
+    ax.text(0.5, 0.95, title, ha='center', va='center', 
+            fontsize=16, fontweight='bold', color='#333333')
+    
+    # Add a footnote
+    ax.text(0.5, 0.05, "For optimal blood sugar management, follow this portion guide", 
+            ha='center', va='center', fontsize=10, color='#555555', style='italic')
+    
+    # Set limits and remove axes
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, 1)
+    ax.axis('off')
 
 
-def create_foods_to_avoid_visual(dietary_restrictions=None):
+def _draw_glucose_guide(ax):
     """
-    Create a visual representation of foods to avoid with diabetes.
+    Draw the blood glucose target ranges onto an axes.
     
     Args:
-        dietary_restrictions (list, optional): Dietary restrictions
-        
-    Returns:
-        matplotlib.figure.Figure: A figure showing foods to avoid
+        ax (matplotlib.axes.Axes): Axes to draw on
     """
-    try:
-        # Create figure with a clean white background and optimized dimensions
-        fig, ax = plt.subplots(figsize=(7, 3))
-        
-        # Set figure background color and reduce margins
-        fig.patch.set_facecolor('#f8f9fa')
-        ax.set_facecolor('#f8f9fa')
-        plt.subplots_adjust(left=0.02, right=0.98, top=0.9, bottom=0.1)
-        
-        # Add title - reduced font size
-        ax.text(0.5, 0.88, "Foods to Limit or Avoid with Diabetes", 
-                ha='center', fontsize=13, fontweight='bold', color='#d32f2f')
-        
-        # Define foods to avoid - customize based on user preferences
-        foods = [
-            "Sugary Drinks", 
-            "White Bread", 
-            "Fried Foods",
-            "Processed Meats", 
-            "Sweets & Desserts"
-        ]
-        
-        # Customize based on dietary restrictions
-        if dietary_restrictions:
-            if "Vegetarian" in dietary_restrictions or "Vegan" in dietary_restrictions:
-                foods[3] = "Processed Foods"  # Replace "Processed Meats" for vegetarians/vegans
-        
-        # Create more compact positions for items (in a single row)
-        num_items = len(foods)
-        x_positions = [0.1 + i * 0.8/(num_items-1) for i in range(num_items)]
-        y_position = 0.55  # Center position
-        
-        # Draw each food item with prohibition symbol - smaller size
-        for i, (x, food) in enumerate(zip(x_positions, foods)):
-            # Draw red circle - smaller size
-            circle = plt.Circle((x, y_position), 0.05, fill=False, 
-                            edgecolor='red', linewidth=1.5)
-            ax.add_patch(circle)
-            
-            # Draw diagonal line for "no" symbol - smaller
-            ax.plot([x-0.035, x+0.035], [y_position+0.035, y_position-0.035], 
-                color='red', linewidth=1.5)
-            
-            # Add food label - smaller font
-            ax.text(x, y_position-0.1, food, ha='center', fontsize=8, 
-                fontweight='bold')
-        
-        # More compact explanation at bottom
-        ax.text(0.5, 0.22, "These foods can cause rapid blood sugar spikes and worsen insulin resistance", 
-            ha='center', fontsize=9, fontstyle='italic')
-        
-        # Set limits and remove axes
-        ax.set_xlim(0, 1)
-        ax.set_ylim(0, 1)
-        ax.axis('off')
-        
-        # Tight layout to reduce whitespace
-        plt.tight_layout()
-        
-        return fig
-    except Exception as e:
-        print(f"Error creating foods to avoid visual: {e}")
-        return None
+    ax.set_facecolor('#f8f9fa')
+    
+    # Create a more attractive glucose meter visualization
+    # Low range (red)
+    ax.add_patch(Rectangle((0, 0.2), 0.3, 0.6, color='#ffcdd2', alpha=0.7))
+    ax.text(0.15, 0.5, "LOW\n< 70 mg/dL\n\nSymptoms:\nShaking, sweating,\nconfusion, dizziness", 
+            ha='center', va='center', fontsize=10, color='#c62828')
+    
+    # Target range (green)
+    ax.add_patch(Rectangle((0.3, 0.2), 0.4, 0.6, color='#c8e6c9', alpha=0.7))
+    ax.text(0.5, 0.5, "TARGET RANGE\n70-180 mg/dL\n\nGoal:\nStay in this range\nas much as possible", 
+            ha='center', va='center', fontsize=12, fontweight='bold', color='#2e7d32')
+    
+    # High range (red)
+    ax.add_patch(Rectangle((0.7, 0.2), 0.3, 0.6, color='#ffcdd2', alpha=0.7))
+    ax.text(0.85, 0.5, "HIGH\n> 180 mg/dL\n\nSymptoms:\nThirst, fatigue,\nfrequent urination", 
+            ha='center', va='center', fontsize=10, color='#c62828')
+    
+    # Add a meter-like pointer
+    triangle_vertices = np.array([[0.5, 0.2], [0.47, 0.15], [0.53, 0.15]])
+    meter = Polygon(triangle_vertices, color='#333333')
+    ax.add_patch(meter)
+    
+    # Add a title
+    ax.text(0.5, 0.9, "BLOOD GLUCOSE TARGET RANGES", ha='center', va='center', 
+            fontsize=16, fontweight='bold', color='#333333')
+    
+    # Set limits and remove axes
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, 1)
+    ax.axis('off')
+
+
+def _draw_foods_to_avoid(ax, dietary_restrictions=None):
+    """
+    Draw the row of foods to limit or avoid onto an axes.
+    
+    Args:
+        ax (matplotlib.axes.Axes): Axes to draw on
+        dietary_restrictions (frozenset, optional): Dietary restrictions
+    """
+    ax.set_facecolor('#f8f9fa')
+    
+    # Add title - reduced font size
+    ax.text(0.5, 0.88, "Foods to Limit or Avoid with Diabetes", 
+            ha='center', fontsize=13, fontweight='bold', color='#d32f2f')
+    
+    # Define foods to avoid - customize based on user preferences
+    foods = [
+        "Sugary Drinks", 
+        "White Bread", 
+        "Fried Foods",
+        "Processed Meats", 
+        "Sweets & Desserts"
+    ]
+    
+    # Customize based on dietary restrictions
+    if PLANT_BASED_DIETS.intersection(dietary_restrictions or ()):
+        foods[3] = "Processed Foods"  # Replace "Processed Meats" for vegetarians/vegans
+    
+    # Create more compact positions for items (in a single row)
+    num_items = len(foods)
+    x_positions = [0.1 + i * 0.8/(num_items-1) for i in range(num_items)]
+    y_position = 0.55  # Center position
+    
+    # Draw each food item with prohibition symbol - smaller size
+    for i, (x, food) in enumerate(zip(x_positions, foods)):
+        # Draw red circle - smaller size
+        circle = plt.Circle((x, y_position), 0.05, fill=False, 
+                        edgecolor='red', linewidth=1.5)
+        ax.add_patch(circle)
+    
+        # Draw diagonal line for "no" symbol - smaller
+        ax.plot([x-0.035, x+0.035], [y_position+0.035, y_position-0.035], 
+            color='red', linewidth=1.5)
+    
+        # Add food label - smaller font
+        ax.text(x, y_position-0.1, food, ha='center', fontsize=8, 
+            fontweight='bold')
+    
+    # More compact explanation at bottom
+    ax.text(0.5, 0.22, "These foods can cause rapid blood sugar spikes and worsen insulin resistance", 
+        ha='center', fontsize=9, fontstyle='italic')
+    
+    # Set limits and remove axes
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, 1)
+    ax.axis('off')
+
+
+def _draw_recommended_foods(ax, cultural_preferences=None, dietary_restrictions=None):
+    """
+    Draw the row of recommended foods onto an axes.
+    
+    Args:
+        ax (matplotlib.axes.Axes): Axes to draw on
+        cultural_preferences (str, optional): Cultural food preferences
+        dietary_restrictions (frozenset, optional): Dietary restrictions
+    """
+    ax.set_facecolor('#f8f9fa')
+    
+    # Add title with reduced font size
+    title = "Recommended Foods for Blood Sugar Management"
+    if cultural_preferences:
+        title = f"Recommended Foods ({cultural_preferences} Options)"
+    
+    ax.text(0.5, 0.88, title, 
+            ha='center', fontsize=13, fontweight='bold', color='#2e7d32')
+    
+    # Define recommended foods - customize based on user preferences
+    foods = [
+        "Whole Grains", 
+        "Fresh Fruit", 
+        "Protein",
+        "Healthy Fats", 
+        "Legumes"
+    ]
+    
+    # Customize based on dietary or cultural preferences
+    if PLANT_BASED_DIETS_ANY_CASE.intersection(dietary_restrictions or ()):
+        foods[2] = "Plant Protein"
+    
+    # Create more compact positions for items (in a single row)
+    num_items = len(foods)
+    x_positions = [0.1 + i * 0.8/(num_items-1) for i in range(num_items)]
+    y_position = 0.55  # Center position
+    
+    # Draw each food item with checkmark - smaller size
+    for i, (x, food) in enumerate(zip(x_positions, foods)):
+        # Draw green circle - smaller size
+        circle = plt.Circle((x, y_position), 0.05, fill=True, 
+                        facecolor='#c8e6c9', edgecolor='#2e7d32', linewidth=1.5)
+        ax.add_patch(circle)
+    
+        # Draw checkmark - smaller
+        ax.plot([x-0.025, x-0.008, x+0.03], [y_position-0.008, y_position-0.025, y_position+0.025], 
+            color='#2e7d32', linewidth=1.5)
+    
+        # Add food label - smaller font
+        ax.text(x, y_position-0.1, food, ha='center', fontsize=8, 
+            fontweight='bold')
+    
+    # More compact explanation at bottom
+    ax.text(0.5, 0.22, "These foods help maintain steady blood glucose levels and support overall health", 
+        ha='center', fontsize=9, fontstyle='italic')
+    
+    # Set limits and remove axes
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, 1)
+    ax.axis('off')
 
 
-def create_recommended_foods_visual(cultural_preferences=None, dietary_restrictions=None):
+@st.cache_resource(ttl=VISUAL_CACHE_TTL, show_spinner=False)
+def create_visual_guides(cultural_preferences=None, food_preferences=None, dietary_restrictions=None):
     """
-    Create a visual representation of recommended foods for diabetes management.
+    Create all four nutrition visual guides as one stacked image.
     
     Args:
         cultural_preferences (str, optional): Cultural food preferences
-        dietary_restrictions (list, optional): Dietary restrictions
+        food_preferences (tuple, optional): Food preferences
+        dietary_restrictions (frozenset, optional): Dietary restrictions
         
     Returns:
-        matplotlib.figure.Figure: A figure showing recommended foods
+        bytes: PNG image with the portion guide, glucose ranges, foods to
+            avoid and recommended foods arranged vertically
     """
     try:
-        # Create figure with a tight layout and adjusted dimensions
-        # Make the figure wider and shorter to fit horizontally on the page
-        fig, ax = plt.subplots(figsize=(7, 3))
-        
-        # Set figure background color and reduce margins
-        fig.patch.set_facecolor('#f8f9fa')
-        ax.set_facecolor('#f8f9fa')
-        plt.subplots_adjust(left=0.02, right=0.98, top=0.9, bottom=0.1)
-        
-        # Add title with reduced font size
-        title = "Recommended Foods for Blood Sugar Management"
-        if cultural_preferences:
-            title = f"Recommended Foods ({cultural_preferences} Options)"
-        
-        ax.text(0.5, 0.88, title, 
-                ha='center', fontsize=13, fontweight='bold', color='#2e7d32')
-        
-        # Define recommended foods - customize based on user preferences
-        foods = [
-            "Whole Grains", 
-            "Fresh Fruit", 
-            "Protein",
-            "Healthy Fats", 
-            "Legumes"
-        ]
-        
-        # Customize based on dietary or cultural preferences
-        if dietary_restrictions:
-            if "vegetarian" in dietary_restrictions or "Vegetarian" in dietary_restrictions:
-                foods[2] = "Plant Protein"
-            elif "vegan" in dietary_restrictions or "Vegan" in dietary_restrictions:
-                foods[2] = "Plant Protein"
-        
-        # Create more compact positions for items (in a single row)
-        num_items = len(foods)
-        x_positions = [0.1 + i * 0.8/(num_items-1) for i in range(num_items)]
-        y_position = 0.55  # Center position
-        
-        # Draw each food item with checkmark - smaller size
-        for i, (x, food) in enumerate(zip(x_positions, foods)):
-            # Draw green circle - smaller size
-            circle = plt.Circle((x, y_position), 0.05, fill=True, 
-                            facecolor='#c8e6c9', edgecolor='#2e7d32', linewidth=1.5)
-            ax.add_patch(circle)
-            
-            # Draw checkmark - smaller
-            ax.plot([x-0.025, x-0.008, x+0.03], [y_position-0.008, y_position-0.025, y_position+0.025], 
-                color='#2e7d32', linewidth=1.5)
-            
-            # Add food label - smaller font
-            ax.text(x, y_position-0.1, food, ha='center', fontsize=8, 
-                fontweight='bold')
-        
-        # More compact explanation at bottom
-        ax.text(0.5, 0.22, "These foods help maintain steady blood glucose levels and support overall health", 
-            ha='center', fontsize=9, fontstyle='italic')
-        
-        # Set limits and remove axes
-        ax.set_xlim(0, 1)
-        ax.set_ylim(0, 1)
-        ax.axis('off')
-        
-        # Tight layout to reduce whitespace
-        plt.tight_layout()
-        
-        return fig
+        fig, axes = plt.subplots(
+            4, 1,
+            figsize=(10, 16),
+            facecolor='#f8f9fa',
+            gridspec_kw={'height_ratios': [6, 4, 3, 3]},
+            constrained_layout=True
+        )
+        _draw_portion_guide(axes[0], cultural_preferences, food_preferences, dietary_restrictions)
+        _draw_glucose_guide(axes[1])
+        _draw_foods_to_avoid(axes[2], dietary_restrictions)
+        _draw_recommended_foods(axes[3], cultural_preferences, dietary_restrictions)
+        return _figure_to_png(fig)
     except Exception as e:
-        print(f"Error creating recommended foods visual: {e}")
+        print(f"Error creating visual guides: {e}")
         return None
 
 